@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+"""
+An in-process stand-in for the REST API of a Neo4j 2.x server, which keeps
+the graph in memory. It understands the batch operations, the legacy Cypher
+query and the Cypher statements which neonx sends, so that uploads and
+downloads can be measured without a real server::
+
+    with FakeNeoServer() as server:
+        write_to_neo(server.url, graph, 'LINKS_TO', 'Node')
+        graph = get_neo_graph(server.url, 'Node')
+"""
+
+import json
+import re
+import threading
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from neonx.cypher import (NODE_QRY, RELATIONSHIP_QRY, CONSTRAINT_QRY,
+                          MERGE_NODE_QRY, MERGE_RELATIONSHIP_QRY,
+                          NODE_PAGE_QRY, RELATIONSHIP_PAGE_QRY)
+
+
+__all__ = ['FakeNeoServer']
+
+
+PREFIX = '/db/data'
+PLACEHOLDER = re.compile(r'\{(\d+)\}')
+NAME = '`((?:[^`]|``)*)`'
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def query_pattern(query, optional=False):
+    """turns one of the Cypher queries of `neonx.cypher` into a regular
+    expression, which captures its labels, keys and relationship types.
+    With `optional`, the label of `NODE_QRY` may be missing.
+    """
+    name = '(?::' + NAME + ')?' if optional else NAME
+    pieces = re.split(r'(\{\d\})',
+                      query.replace('{{', '{').replace('}}', '}'))
+    return re.compile('^' + ''.join(name if i % 2 else re.escape(piece)
+                                    for i, piece in enumerate(pieces)) + '$')
+
+
+def unquote(name):
+    return name.replace('``', '`') if name is not None else None
+
+
+class Graph(object):
+    """the nodes and relationships stored by the fake server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.nodes = {}
+        self.relationships = {}
+        self.next_id = 0
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    def create_node(self, properties, label=None):
+        node_id = self.new_id()
+        self.nodes[node_id] = (dict(properties), set([label] if label
+                                                     else []))
+        return node_id
+
+    def create_relationship(self, from_id, to_id, rel_name, properties):
+        rel_id = self.new_id()
+        self.relationships[rel_id] = (from_id, rel_name, dict(properties),
+                                      to_id)
+        return rel_id
+
+    def labelled(self, label):
+        return sorted(node_id for node_id, (_, labels) in self.nodes.items()
+                      if label in labels)
+
+    def labelled_relationships(self, label):
+        nodes = set(self.labelled(label))
+        return sorted(rel_id for rel_id, rel in self.relationships.items()
+                      if rel[0] in nodes and rel[3] in nodes)
+
+    def find(self, label, key, value):
+        for node_id, (properties, labels) in self.nodes.items():
+            if label in labels and properties.get(key) == value:
+                return node_id
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def base(self):
+        return 'http://{0}:{1}{2}'.format(self.server.server_address[0],
+                                          self.server.server_address[1],
+                                          PREFIX)
+
+    def read_body(self):
+        if self.headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b''.join(chunks)
+        else:
+            body = self.rfile.read(int(self.headers.get('content-length',
+                                                        0)))
+        encoding = self.headers.get('content-encoding')
+        if encoding in WBITS:
+            body = zlib.decompress(body, WBITS[encoding])
+        return json.loads(body.decode('utf-8')) if body else None
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        if self.server.compress and \
+                'gzip' in self.headers.get('accept-encoding', ''):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, WBITS['gzip'])
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        base = self.base
+        self.send_json({"node": base + "/node",
+                        "batch": base + "/batch",
+                        "cypher": base + "/cypher",
+                        "transaction": base + "/transaction",
+                        "neo4j_version": "2.1.0-fake"})
+
+    def do_POST(self):
+        data = self.read_body()
+        graph = self.server.graph
+        try:
+            with graph.lock:
+                if self.path == PREFIX + '/batch':
+                    result = self.batch(graph, data)
+                elif self.path == PREFIX + '/transaction/commit':
+                    result = {"results": [self.statement(graph, statement)
+                                          for statement
+                                          in data['statements']],
+                              "errors": []}
+                else:
+                    return self.send_json({"exception": "NotFound",
+                                           "stacktrace": []}, 404)
+        except Exception as e:
+            return self.send_json({"exception": repr(e),
+                                   "stacktrace": []}, 500)
+        self.send_json(result)
+
+    def batch(self, graph, operations):
+        base = self.base
+        locations = {}
+        results = []
+
+        def resolve(url):
+            url = PLACEHOLDER.sub(lambda m: locations[int(m.group(1))], url)
+            return url[len(base):] if url.startswith(base) else url
+
+        for operation in operations:
+            path = resolve(operation['to'])
+            body = operation.get('body')
+            parts = path.strip('/').split('/')
+            item = {"from": operation['to']}
+            if 'id' in operation:
+                item['id'] = operation['id']
+
+            if operation['method'] == 'POST' and path == '/node':
+                node_id = graph.create_node(body or {})
+                item['location'] = '{0}/node/{1}'.format(base, node_id)
+                item['body'] = {"self": item['location'], "data": body}
+            elif parts[-1] == 'labels':
+                graph.nodes[int(parts[1])][1].add(body)
+            elif parts[-1] == 'relationships':
+                to_id = int(resolve(body['to']).rpartition('/')[-1])
+                rel_id = graph.create_relationship(int(parts[1]), to_id,
+                                                   body['type'],
+                                                   body.get('data') or {})
+                item['location'] = '{0}/relationship/{1}'.format(
+                    base, rel_id)
+            elif parts[-1] == 'properties':
+                store = graph.nodes if parts[0] == 'node' else \
+                    graph.relationships
+                properties = store[int(parts[1])][0 if parts[0] == 'node'
+                                                  else 2]
+                properties.clear()
+                properties.update(body)
+            elif operation['method'] == 'DELETE':
+                store = graph.nodes if parts[0] == 'node' else \
+                    graph.relationships
+                del store[int(parts[1])]
+            elif parts[0] == 'label':
+                item['body'] = [{"self": '{0}/node/{1}'.format(base, node_id),
+                                 "data": graph.nodes[node_id][0]}
+                                for node_id in graph.labelled(parts[1])]
+            elif path == '/cypher':
+                label = body['query'].split(':', 1)[1].split(')', 1)[0]
+                rows = []
+                for rel_id in graph.labelled_relationships(label):
+                    from_id, rel_name, properties, to_id = \
+                        graph.relationships[rel_id]
+                    rows.append([from_id, {"type": rel_name,
+                                           "data": properties}, to_id])
+                item['body'] = {"columns": ["ID(a)", "r", "ID(b)"],
+                                "data": rows}
+            else:
+                raise ValueError("Unsupported operation: " + path)
+
+            if 'id' in operation and 'location' in item:
+                locations[operation['id']] = item['location']
+            results.append(item)
+        return results
+
+    def statement(self, graph, statement):
+        query = statement['statement']
+        params = statement.get('parameters') or {}
+        rows = []
+
+        match = NODE_PATTERN.match(query)
+        if match:
+            label = unquote(match.group(1))
+            for properties in params['rows']:
+                rows.append([graph.create_node(properties, label)])
+        elif RELATIONSHIP_PATTERN.match(query):
+            rel_name = unquote(RELATIONSHIP_PATTERN.match(query).group(1))
+            for from_id, to_id, properties in params['rows']:
+                graph.create_relationship(from_id, to_id, rel_name,
+                                          properties)
+        elif CONSTRAINT_PATTERN.match(query):
+            pass
+        elif MERGE_NODE_PATTERN.match(query):
+            label, key = [unquote(g) for g in
+                          MERGE_NODE_PATTERN.match(query).groups()]
+            for value, properties in params['rows']:
+                node_id = graph.find(label, key, value)
+                if node_id is None:
+                    node_id = graph.create_node({key: value}, label)
+                graph.nodes[node_id][0].update(properties)
+        elif MERGE_RELATIONSHIP_PATTERN.match(query):
+            groups = MERGE_RELATIONSHIP_PATTERN.match(query).groups()
+            label, key, rel_name = [unquote(groups[i]) for i in (0, 1, -1)]
+            for from_value, to_value, properties in params['rows']:
+                from_id = graph.find(label, key, from_value)
+                to_id = graph.find(label, key, to_value)
+                if from_id is None or to_id is None:
+                    continue
+                for rel_id, rel in graph.relationships.items():
+                    if rel[:2] == (from_id, rel_name) and rel[3] == to_id:
+                        rel[2].update(properties)
+                        break
+                else:
+                    graph.create_relationship(from_id, to_id, rel_name,
+                                              properties)
+        elif NODE_PAGE_PATTERN.match(query):
+            label = unquote(NODE_PAGE_PATTERN.match(query).group(1))
+            ids = [node_id for node_id in graph.labelled(label)
+                   if node_id > params['last']][:params['limit']]
+            rows = [[node_id, graph.nodes[node_id][0]] for node_id in ids]
+        elif RELATIONSHIP_PAGE_PATTERN.match(query):
+            label = unquote(RELATIONSHIP_PAGE_PATTERN.match(query).group(1))
+            ids = [rel_id for rel_id in graph.labelled_relationships(label)
+                   if rel_id > params['last']][:params['limit']]
+            for rel_id in ids:
+                from_id, rel_name, properties, to_id = \
+                    graph.relationships[rel_id]
+                rows.append([rel_id, from_id, rel_name, properties, to_id])
+        else:
+            raise ValueError("Unsupported statement: " + query)
+
+        return {"columns": [], "data": [{"row": row} for row in rows]}
+
+
+NODE_PATTERN = query_pattern(NODE_QRY, optional=True)
+RELATIONSHIP_PATTERN = query_pattern(RELATIONSHIP_QRY)
+CONSTRAINT_PATTERN = query_pattern(CONSTRAINT_QRY)
+MERGE_NODE_PATTERN = query_pattern(MERGE_NODE_QRY)
+MERGE_RELATIONSHIP_PATTERN = query_pattern(MERGE_RELATIONSHIP_QRY)
+NODE_PAGE_PATTERN = query_pattern(NODE_PAGE_QRY)
+RELATIONSHIP_PAGE_PATTERN = query_pattern(RELATIONSHIP_PAGE_QRY)
+
+
+class Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+class FakeNeoServer(object):
+    """runs a fake Neo4j server on a free local port in a background
+    thread. Its URL is `url`, and the stored nodes and relationships are
+    in `graph`. Compressed request bodies are accepted, and with `compress`
+    the answers are compressed with gzip if the client accepts it."""
+
+    def __init__(self, compress=False):
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.server.compress = compress
+        self.server.graph = Graph()
+        self.graph = self.server.graph
+        self.url = 'http://{0}:{1}{2}/'.format(self.server.server_address[0],
+                                               self.server.server_address[1],
+                                               PREFIX)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures the throughput of the Geoff and batch serializers and the latency
+of uploads and downloads against :class:`FakeNeoServer`, on synthetic
+graphs. Run it from the root of the repository::
+
+    python -m benchmarks.run --nodes 1000,10000 --output results.json
+
+Every measurement is a JSON object with the name of the benchmark, the
+graph and its size, the best time of the repeats in seconds and, for the
+serializers, the peak memory allocated by Python in bytes (Python 3.4+
+only) and the size of the output in bytes. The peak memory of the uploads
+and downloads would include the fake server, which runs in a thread of
+the same process, so it is `null` for them.
+"""
+
+import gc
+import json
+import multiprocessing
+import optparse
+import platform
+import random
+import sys
+import timeit
+
+import networkx as nx
+
+import neonx
+from neonx.neo import generate_data
+
+from .fake_neo import FakeNeoServer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+REL_NAME = 'LINKS_TO'
+LABEL = 'Node'
+GRAPHS = ('gnm', 'scale_free', 'attributes')
+BENCHMARKS = ('get_geoff', 'get_geoff_parallel', 'generate_data',
+              'generate_data_parallel', 'write_batch', 'write_gzip',
+              'write_chunks', 'write_adaptive', 'write_cypher',
+              'get_neo_graph',
+              'get_neo_graph_pages', 'get_neo_graph_gzip')
+
+
+def gnm_graph(n, seed):
+    """a uniform random graph with `n` nodes and `4 * n` edges."""
+    return nx.gnm_random_graph(n, 4 * n, seed=seed)
+
+
+def scale_free_graph(n, seed):
+    """a Barabasi-Albert graph with `n` nodes, whose degrees follow a
+    power law."""
+    return nx.barabasi_albert_graph(n, 4, seed=seed)
+
+
+def attributes_graph(n, seed):
+    """a uniform random graph with `n` nodes and `4 * n` edges, with a
+    dozen attributes of mixed types on every node and edge."""
+    graph = gnm_graph(n, seed)
+    rand = random.Random(seed)
+    for node, properties in graph.nodes(data=True):
+        properties.update(('attr%d' % i, rand.random()) for i in range(4))
+        properties.update(('tag%d' % i, 'tag-%d' % rand.randint(0, 100))
+                          for i in range(4))
+        properties.update(('count%d' % i, rand.randint(0, 1000))
+                          for i in range(4))
+        properties['name'] = 'node-%d' % node
+    for _, _, properties in graph.edges(data=True):
+        properties.update(weight=rand.random(),
+                          kind=rand.choice(['a', 'b', 'c']),
+                          since=rand.randint(1990, 2014))
+    return graph
+
+
+GENERATORS = {'gnm': gnm_graph,
+              'scale_free': scale_free_graph,
+              'attributes': attributes_graph}
+
+
+def measure(func, repeat, trace=True):
+    """calls `func` `repeat` times and returns the best time, the peak
+    memory allocated during the first call and the result of the last
+    call.
+
+    :param func: a function without arguments
+    :param repeat: the number of calls
+    :param optional trace: False to skip the measurement of the memory
+    :rtype: a tuple of the time in seconds, the peak memory in bytes or
+        None, and the result of `func`
+    """
+    trace = trace and tracemalloc is not None
+    peak = None
+    best = None
+    result = None
+    for i in range(repeat):
+        result = None
+        gc.collect()
+        if trace and i == 0:
+            tracemalloc.start()
+        start = timeit.default_timer()
+        result = func()
+        elapsed = timeit.default_timer() - start
+        if trace and i == 0:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, peak, result
+
+
+def run_benchmark(name, graph, repeat, processes=None):
+    """runs a single benchmark on `graph`.
+
+    :param name: one of `BENCHMARKS`
+    :param graph: a NetworkX graph
+    :param repeat: the number of repeats
+    :param optional processes: the number of worker processes of the
+        `_parallel` benchmarks
+    :rtype: a dictionary of measurements
+    """
+    encoder = json.JSONEncoder()
+    size = None
+    peak = None
+    if not name.endswith('_parallel'):
+        processes = None
+
+    if name.startswith('get_geoff'):
+        seconds, peak, data = measure(
+            lambda: neonx.get_geoff(graph, REL_NAME, processes=processes),
+            repeat)
+        size = len(data.encode('utf-8'))
+    elif name.startswith('generate_data'):
+        seconds, peak, data = measure(
+            lambda: generate_data(graph, REL_NAME, LABEL, encoder,
+                                  processes=processes), repeat)
+        size = len(data.encode('utf-8'))
+    elif name.startswith('write_'):
+        options = {'write_batch': {},
+                   'write_gzip': {'compression': 'gzip'},
+                   'write_chunks': {'batch_size': 1000},
+                   'write_adaptive': {'batch_size': 'auto'},
+                   'write_cypher': {'batch_size': 1000,
+                                    'backend': 'cypher'}}[name]
+        times = []
+        for _ in range(repeat):
+            with FakeNeoServer() as server:
+                seconds, _, _ = measure(
+                    lambda: neonx.write_to_neo(server.url, graph, REL_NAME,
+                                               LABEL, **options), 1,
+                    trace=False)
+            times.append(seconds)
+        seconds = min(times)
+    else:
+        page_size = 1000 if name == 'get_neo_graph_pages' else None
+        compress = name == 'get_neo_graph_gzip'
+        with FakeNeoServer(compress) as server:
+            neonx.write_to_neo(server.url, graph, REL_NAME, LABEL)
+            seconds, _, _ = measure(
+                lambda: neonx.get_neo_graph(server.url, LABEL,
+                                            page_size=page_size), repeat,
+                trace=False)
+
+    return {'benchmark': name, 'seconds': seconds, 'peak_bytes': peak,
+            'payload_bytes': size}
+
+
+def split_choices(parser, value, choices):
+    """splits the comma separated option `value` and checks that every
+    item is one of `choices`.
+
+    :param parser: the `optparse.OptionParser`, which reports errors
+    :param value: a comma separated string
+    :param choices: the allowed items
+    :rtype: a list of strings
+    """
+    items = value.split(',')
+    for item in items:
+        if item not in choices:
+            parser.error('invalid choice: {0} (choose from {1})'.format(
+                item, ', '.join(choices)))
+    return items
+
+
+def main(argv=None):
+    # optparse instead of argparse, which Python 2.6 lacks
+    parser = optparse.OptionParser(description=__doc__.split('\n\n')[1])
+    parser.add_option('--nodes', default='1000',
+                      help='the comma separated numbers of nodes of the '
+                      'graphs')
+    parser.add_option('--graphs', default=','.join(GRAPHS),
+                      help='the comma separated graphs')
+    parser.add_option('--benchmarks', default=','.join(BENCHMARKS),
+                      help='the comma separated benchmarks')
+    parser.add_option('--repeat', type='int', default=3)
+    parser.add_option('--seed', type='int', default=42)
+    parser.add_option('--processes', type='int',
+                      default=multiprocessing.cpu_count(),
+                      help='the worker processes of the _parallel '
+                      'benchmarks (the number of CPUs)')
+    parser.add_option('--output',
+                      help='the JSON file of the results (stdout)')
+    args, _ = parser.parse_args(argv)
+
+    try:
+        args.nodes = [int(n) for n in args.nodes.split(',')]
+    except ValueError:
+        parser.error('invalid numbers of nodes: {0}'.format(args.nodes))
+    args.graphs = split_choices(parser, args.graphs, GRAPHS)
+    args.benchmarks = split_choices(parser, args.benchmarks, BENCHMARKS)
+
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    try:
+        write_results(args, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def write_results(args, output):
+    """runs the benchmarks selected by the command line `args` and writes
+    their results to the file `output`.
+
+    :param args: the options parsed by :func:`main`
+    :param output: a file opened for writing
+    """
+    results = []
+    for kind in args.graphs:
+        for n in args.nodes:
+            graph = GENERATORS[kind](n, args.seed)
+            for name in args.benchmarks:
+                result = run_benchmark(name, graph, args.repeat,
+                                       args.processes)
+                result.update(graph=kind, nodes=graph.number_of_nodes(),
+                              edges=graph.number_of_edges())
+                results.append(result)
+                sys.stderr.write('{graph:<10} {nodes:>8} {benchmark:<24} '
+                                 '{seconds:.4f}s\n'.format(**result))
+
+    json.dump({'python': platform.python_version(),
+               'networkx': nx.__version__,
+               'neonx': neonx.__version__,
+               'results': results}, output, indent=2, sort_keys=True)
+    output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
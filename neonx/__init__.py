@@ -5,8 +5,19 @@ __author__ = 'Rohit Aggarwal'
 __email__ = 'rohit.neonx@mailnull.com'
 __version__ = '0.2.0'
 
-__all__ = ['get_geoff', 'write_to_neo', 'get_neo_graph']
+__all__ = ['get_geoff', 'iter_geoff', 'write_geoff', 'iter_geoff_stream',
+           'write_geoff_stream', 'parse_geoff', 'read_geoff', 'NeoClient',
+           'write_to_neo', 'write_stream_to_neo', 'add_edges_to_neo',
+           'get_neo_graph', 'Snapshot', 'sync_to_neo', 'MetricsRecorder',
+           'write_csv', 'AdaptiveBatchSize', 'NodeIdStore']
 
 
-from .geoff import get_geoff
-from .neo import write_to_neo, get_neo_graph
+from .adaptive import AdaptiveBatchSize
+from .bulk import write_csv
+from .geoff import (get_geoff, iter_geoff, write_geoff, iter_geoff_stream,
+                    write_geoff_stream, parse_geoff, read_geoff)
+from .metrics import MetricsRecorder
+from .neo import (NeoClient, write_to_neo, write_stream_to_neo,
+                  add_edges_to_neo, get_neo_graph)
+from .store import NodeIdStore
+from .sync import Snapshot, sync_to_neo
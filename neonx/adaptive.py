@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import threading
+
+__all__ = ['AdaptiveBatchSize']
+
+
+class AdaptiveBatchSize(object):
+    """A batch size which adapts to the server, for
+    `write_to_neo(batch_size=...)`. It is controlled like the congestion
+    window of TCP, by additive increase and multiplicative decrease: after
+    every request which was answered within `target_seconds` the size grows
+    by `step` operations, and after a slower or failed request it shrinks
+    by the factor `decrease`. No request body is ever larger than
+    `max_bytes`, and the size is limited to what fits into it, judging by
+    the last request::
+
+        from neonx import AdaptiveBatchSize, write_to_neo
+
+        batch_size = AdaptiveBatchSize(target_seconds=5.0)
+        write_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                     'Node', batch_size=batch_size)
+        print(batch_size.size)
+
+    The size which was found can be passed on to the next upload. It can
+    be used from several threads.
+
+    :param optional initial: the number of operations of the first request
+    :param optional minimum: the smallest number of operations per request
+    :param optional maximum: the largest number of operations per request
+    :param optional target_seconds: the longest acceptable duration of a
+        request
+    :param optional step: the number of operations added after a fast
+        request
+    :param optional decrease: the factor applied after a slow or failed
+        request
+    :param optional max_bytes: the largest request body
+    :param optional max_failures: the number of failed requests in a row
+        after which the upload is given up
+    """
+
+    def __init__(self, initial=1000, minimum=1, maximum=100000,
+                 target_seconds=2.0, step=1000, decrease=0.5,
+                 max_bytes=8 * 1024 * 1024, max_failures=5):
+        if not 0 < decrease < 1:
+            raise ValueError("The decrease must be between 0 and 1.")
+        if not 0 < minimum <= maximum:
+            raise ValueError("The minimum must be between 1 and the "
+                             "maximum.")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = max(min(initial, maximum), minimum)
+        self.target_seconds = target_seconds
+        self.step = step
+        self.decrease = decrease
+        self.max_bytes = max_bytes
+        self.max_failures = max_failures
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def shrink(self, limit=None):
+        """decreases the size multiplicatively, or to `limit` if that is
+        smaller."""
+        size = int(self.size * self.decrease)
+        if limit is not None:
+            size = min(size, limit)
+        self.size = max(size, self.minimum)
+
+    def update(self, operations, seconds, request_bytes):
+        """adapts the size to a request which was answered.
+
+        :param operations: the number of operations of the request
+        :param seconds: the duration of the request
+        :param request_bytes: the size of the request body
+        """
+        with self.lock:
+            self.failures = 0
+            if seconds > self.target_seconds:
+                self.shrink()
+            elif operations >= self.size:
+                self.size = min(self.size + self.step, self.maximum)
+
+            fitting = int(self.max_bytes * operations // request_bytes)
+            self.size = max(min(self.size, fitting), self.minimum)
+
+    def failed(self):
+        """adapts the size to a request which failed.
+
+        :rtype: True if the request should be sent again in smaller
+            chunks, False after too many failures in a row
+        """
+        with self.lock:
+            self.failures += 1
+            self.shrink()
+            return self.failures <= self.max_failures
+
+    def iter_payloads(self, items, encode, per_item=1):
+        """splits `items` into chunks of the current size and encodes them.
+        A chunk whose body is larger than `max_bytes` is split in half
+        until it fits.
+
+        :param items: an iterable of nodes or edges
+        :param encode: a function which encodes a list of items
+        :param optional per_item: the number of operations per item
+        :rtype: an iterator of `(chunk, data)` tuples
+        """
+        items = iter(items)
+        pending = []
+        while True:
+            size = max(self.size // per_item, 1)
+            chunk = pending[:size]
+            del pending[:size]
+            chunk.extend(itertools.islice(items, size - len(chunk)))
+            if not chunk:
+                return
+
+            data = encode(chunk)
+            while len(data) > self.max_bytes:
+                if len(chunk) == 1:
+                    raise ValueError("A single operation is larger than "
+                                     "{0} bytes.".format(self.max_bytes))
+                half = len(chunk) // 2
+                pending[:0] = chunk[half:]
+                chunk = chunk[:half]
+                data = encode(chunk)
+                with self.lock:
+                    self.shrink(len(chunk) * per_item)
+            yield chunk, data
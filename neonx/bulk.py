@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+import networkx as nx
+
+from .index import get_node_index
+from .utils import UNDIRECTED_MODES, iter_edges
+
+__all__ = ['write_csv']
+
+
+BUFFER_SIZE = 64 * 1024
+ARRAY_DELIMITER = ';'
+TEXT_TYPE = type(u'')
+INTEGER_TYPES = tuple(set([int, type(2 ** 64)]))
+
+
+def get_type(value):
+    """returns the type of a column of the bulk importer for `value`.
+
+    :param value: an attribute value
+    :rtype: e.g. `'long'` or `'string[]'`, or None for an empty list
+    """
+    if isinstance(value, bool):
+        return 'boolean'
+    elif isinstance(value, INTEGER_TYPES):
+        return 'long'
+    elif isinstance(value, float):
+        return 'double'
+    elif isinstance(value, (list, tuple)):
+        element_type = None
+        for element in value:
+            element_type = merge_types(element_type, get_type(element))
+        if element_type is None:
+            return None
+        if element_type.endswith('[]'):
+            return 'string'
+        return element_type + '[]'
+    return 'string'
+
+
+def merge_types(a, b):
+    """returns a column type which can hold values of both types.
+
+    :param a: a column type or None
+    :param b: a column type or None
+    :rtype: a column type or None
+    """
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    numbers = set([a.rstrip('[]'), b.rstrip('[]')])
+    numbers = numbers == set(['long', 'double'])
+    if numbers and a.endswith('[]') == b.endswith('[]'):
+        return 'double[]' if a.endswith('[]') else 'double'
+    return 'string'
+
+
+def get_columns(rows):
+    """finds the columns and their types for dictionaries of attributes.
+
+    :param rows: an iterable of dictionaries of attributes
+    :rtype: a sorted list of `(name, type)` tuples
+    """
+    columns = {}
+    for properties in rows:
+        for name, value in properties.items():
+            columns[name] = merge_types(columns.get(name), get_type(value))
+    return sorted((name, column_type or 'string[]')
+                  for name, column_type in columns.items())
+
+
+def quote(value):
+    """quotes a CSV field.
+
+    :param value: a string
+    :rtype: the string in double quotes
+    """
+    return u'"{0}"'.format(value.replace(u'"', u'""'))
+
+
+def format_scalar(value, column_type):
+    """formats a single value of a column.
+
+    :param value: an attribute value
+    :param column_type: a column type without `[]`
+    :rtype: a string
+    """
+    if column_type == 'boolean':
+        return u'true' if value else u'false'
+    elif column_type == 'long':
+        return TEXT_TYPE(int(value))
+    elif column_type == 'double':
+        return repr(float(value))
+    elif isinstance(value, type(b'')):
+        return value.decode('utf-8')
+    return TEXT_TYPE(value)
+
+
+def format_value(value, column_type):
+    """formats a CSV field of a column. A missing value is an empty
+    field.
+
+    :param value: an attribute value or None
+    :param column_type: a column type
+    :rtype: a string
+    """
+    if value is None:
+        return u''
+    if column_type.endswith('[]'):
+        element_type = column_type[:-2]
+        return quote(ARRAY_DELIMITER.join(format_scalar(element,
+                                                        element_type)
+                                          for element in value))
+    if column_type == 'string':
+        return quote(format_scalar(value, column_type))
+    return format_scalar(value, column_type)
+
+
+def get_header(ids, columns, labels):
+    """builds the header line of a CSV file.
+
+    :param ids: the names of the ID columns, e.g. `[':ID']`
+    :param columns: a list of `(name, type)` tuples
+    :param labels: the names of the columns after the properties
+    :rtype: a string
+    """
+    return u','.join(ids + [u'{0}:{1}'.format(name, column_type)
+                            for name, column_type in columns] + labels)
+
+
+def write_files(prefix, kind, header, lines, count, shards):
+    """writes the header and the lines of a CSV file into a header file
+    and `shards` data files of the same length. Only a small buffer of
+    lines is held in memory.
+
+    :param prefix: the path prefix of the files
+    :param kind: `'nodes'` or `'relationships'`
+    :param header: the header line
+    :param lines: an iterable of lines
+    :param count: the number of lines
+    :param shards: the number of data files
+    :rtype: a list of the paths of the header and the data files
+    """
+    header_path = '{0}{1}_header.csv'.format(prefix, kind)
+    with open(header_path, 'wb') as f:
+        f.write((header + u'\n').encode('utf-8'))
+
+    paths = [header_path]
+    shard_size = max(1, -(-count // shards))
+    lines = iter(lines)
+    for shard in range(shards):
+        path = '{0}{1}_{2}.csv'.format(prefix, kind, shard)
+        paths.append(path)
+        with open(path, 'wb') as f:
+            buf = []
+            size = 0
+            for line in itertools.islice(lines, shard_size):
+                buf.append(line)
+                size += len(line)
+                if size >= BUFFER_SIZE:
+                    f.write(u''.join(buf).encode('utf-8'))
+                    buf = []
+                    size = 0
+            f.write(u''.join(buf).encode('utf-8'))
+    return paths
+
+
+def write_csv(graph, prefix, edge_rel_name, label=None, key=None,
+              undirected='both', shards=1):
+    """ Write the `graph` as CSV files for the bulk importer of Neo4j
+    (`neo4j-admin import`), which is much faster than uploading it to a
+    running server::
+
+        from neonx import write_csv
+
+        files = write_csv(G, 'export/', 'LINKS_TO', 'Node', shards=4)
+
+        # neo4j-admin import --nodes=export/nodes_header.csv,\
+export/nodes_0.csv,... --relationships=...
+        args = ['--{0}={1}'.format(kind, ','.join(paths))
+                for kind, paths in files.items()]
+
+    The header of the nodes and of the relationships is written to a file
+    of its own, `nodes_header.csv` and `relationships_header.csv`, and the
+    rows to `shards` files of the same length, `nodes_0.csv`, ... and
+    `relationships_0.csv`, .... Only a small buffer of lines is held in
+    memory. The graph is read twice, once to find the columns.
+
+    The nodes get the IDs `0, 1, 2, ...`, in the order of the graph, and
+    `label`, the relationships the type `edge_rel_name`. Every edge of an
+    undirected graph becomes two relationships, one in each direction,
+    unless `undirected` is `'single'`, as with :func:`neonx.write_to_neo`.
+    If `key` is present, the node names are stored in the property `key`.
+
+    The type of every column is derived from its values: `boolean`,
+    `long`, `double` or `string`, and arrays of them for lists. Values of
+    other types are written as strings. Arrays are separated by `;`.
+    Strings which contain line breaks need `--multiline-fields=true`.
+
+    :param graph: A NetworkX Graph or a DiGraph.
+    :param prefix: The path prefix of the files, e.g. a directory.
+    :param edge_rel_name: Relationship name between the nodes.
+    :param optional label: The label of the nodes.
+    :param optional key: Property which stores the node names.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`.
+    :param optional shards: Number of data files of the nodes and of the
+        relationships.
+    :rtype: A dictionary which maps `'nodes'` and `'relationships'` to the
+        list of the paths of the header and the data files.
+    """
+
+    if undirected not in UNDIRECTED_MODES:
+        raise ValueError("Unknown undirected mode: {0}".format(undirected))
+    if shards < 1:
+        raise ValueError("At least one shard is needed.")
+
+    node_columns = get_columns(properties for _, properties
+                               in graph.nodes(data=True))
+    if key is not None:
+        node_columns = [(name, column_type) for name, column_type
+                        in node_columns if name != key]
+        key_type = None
+        for node_name in graph:
+            key_type = merge_types(key_type, get_type(node_name))
+        node_columns.insert(0, (key, key_type or 'string'))
+
+    label_field = [quote(label)] if label else []
+
+    def node_lines():
+        for i, (node_name, properties) in enumerate(graph.nodes(data=True)):
+            if key is not None:
+                properties = dict(properties)
+                properties[key] = node_name
+            fields = [TEXT_TYPE(i)]
+            fields.extend(format_value(properties.get(name), column_type)
+                          for name, column_type in node_columns)
+            fields.extend(label_field)
+            yield u','.join(fields) + u'\n'
+
+    node_header = get_header([u':ID'], node_columns,
+                             [u':LABEL'] if label else [])
+    files = {'nodes': write_files(prefix, 'nodes', node_header, node_lines(),
+                                  graph.number_of_nodes(), shards)}
+
+    edge_columns = get_columns(properties for _, _, properties
+                               in graph.edges(data=True))
+    nodes = get_node_index(graph)
+    rel_field = quote(edge_rel_name)
+
+    def relationship_lines():
+        edges = iter_edges(graph, undirected)
+        for from_node, to_node, properties in edges:
+            fields = [TEXT_TYPE(nodes[from_node]), TEXT_TYPE(nodes[to_node]),
+                      rel_field]
+            fields.extend(format_value(properties.get(name), column_type)
+                          for name, column_type in edge_columns)
+            yield u','.join(fields) + u'\n'
+
+    count = graph.number_of_edges()
+    if undirected == 'both' and not isinstance(graph, nx.DiGraph):
+        count *= 2
+    relationship_header = get_header([u':START_ID', u':END_ID', u':TYPE'],
+                                     edge_columns, [])
+    files['relationships'] = write_files(prefix, 'relationships',
+                                         relationship_header,
+                                         relationship_lines(), count, shards)
+    return files
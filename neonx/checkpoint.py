@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import threading
+
+__all__ = ['Checkpoint']
+
+
+class Checkpoint(object):
+    """The progress of a chunked upload, logged to a file so that an
+    interrupted upload can be resumed. Every committed chunk appends a
+    record with its index and the Neo4j IDs of the nodes it created, so a
+    commit costs the same however far the upload has got.
+
+    A record which was only partially written when the upload was
+    interrupted is ignored.
+
+    :param path: the path of the log file. An existing log is loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.node_ids = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            self.load()
+        self.file = open(path, 'ab')
+
+    def load(self):
+        """reads the committed chunks from the log file."""
+        with open(self.path, 'rb') as f:
+            size = 0
+            while True:
+                try:
+                    index, node_ids = pickle.load(f)
+                except Exception:
+                    # the end of the log, or a truncated record
+                    break
+                self.done.add(index)
+                self.node_ids.update(node_ids)
+                size = f.tell()
+
+        # drop a partially written record, so that new ones can be appended
+        if size != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(size)
+
+    def commit(self, index, node_ids=()):
+        """records that the chunk `index` has been committed by the
+        server.
+
+        :param index: the index of the chunk
+        :param optional node_ids: a list of `(node_name, neo4j_id)` tuples
+            of the nodes created by the chunk
+        """
+        node_ids = list(node_ids)
+        with self.lock:
+            pickle.dump((index, node_ids), self.file, 2)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.done.add(index)
+            self.node_ids.update(node_ids)
+
+    def close(self):
+        """closes the log file."""
+        self.file.close()
+
+    def remove(self):
+        """closes and deletes the log file, once the upload is complete."""
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+__all__ = ['get_arrays', 'get_sparse']
+
+
+def add_row(columns, count, properties):
+    """appends `properties` to the property columns of `count` earlier
+    rows. A column which is missing from a row gets `None`.
+
+    :param columns: a dictionary which maps names to lists of values
+    :param count: the number of rows already in the columns
+    :param properties: a dictionary of attributes
+    """
+    for name, value in properties.items():
+        column = columns.get(name)
+        if column is None:
+            column = columns[name] = [None] * count
+        column.append(value)
+
+    for name, column in columns.items():
+        if len(column) == count:
+            column.append(None)
+
+
+def get_arrays(node_rows, relationship_rows):
+    """builds NumPy arrays from the rows of the paged node and relationship
+    queries, without building a NetworkX graph.
+
+    The result is a dictionary with
+
+    * `node_ids`: the Neo4j IDs of the nodes,
+    * `node_properties`: a dictionary which maps every node attribute to
+      an array of its values, in the order of `node_ids`,
+    * `edges`: an array with the Neo4j IDs of the source and the target
+      node of every relationship,
+    * `edge_properties`: a dictionary which maps every relationship
+      attribute to an array of its values, in the order of `edges`. The
+      relationship types are stored as `neo_rel_name`.
+
+    Missing attributes are `None`.
+
+    :param node_rows: an iterable of `[node_id, properties]` rows
+    :param relationship_rows: an iterable of `[rel_id, from_id, rel_name,
+        properties, to_id]` rows
+    :rtype: a dictionary of NumPy arrays
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("get_arrays() requires numpy: "
+                          "http://www.numpy.org/")
+
+    node_ids = []
+    node_columns = {}
+    for node_id, properties in node_rows:
+        add_row(node_columns, len(node_ids), properties)
+        node_ids.append(node_id)
+
+    edges = []
+    edge_columns = {'neo_rel_name': []}
+    for _, from_node_id, rel_name, properties, to_node_id in \
+            relationship_rows:
+        properties['neo_rel_name'] = rel_name
+        add_row(edge_columns, len(edges), properties)
+        edges.append((from_node_id, to_node_id))
+
+    return {'node_ids': np.array(node_ids, dtype=np.int64),
+            'node_properties': dict((name, np.array(column))
+                                    for name, column in node_columns.items()),
+            'edges': np.array(edges, dtype=np.int64).reshape(-1, 2),
+            'edge_properties': dict((name, np.array(column))
+                                    for name, column in edge_columns.items())}
+
+
+def get_sparse(node_rows, relationship_rows):
+    """builds a `scipy.sparse` adjacency matrix from the rows of the paged
+    node and relationship queries, without building a NetworkX graph.
+
+    The rows and columns of the matrix are in the order of the returned
+    Neo4j node IDs, which are sorted. An entry is the number of
+    relationships between the two nodes.
+
+    :param node_rows: an iterable of `[node_id, properties]` rows
+    :param relationship_rows: an iterable of `[rel_id, from_id, rel_name,
+        properties, to_id]` rows
+    :rtype: a tuple of a CSR matrix and an array of the Neo4j node IDs
+    """
+    try:
+        import numpy as np
+        import scipy.sparse
+    except ImportError:
+        raise ImportError("get_sparse() requires numpy and scipy: "
+                          "http://www.scipy.org/")
+
+    node_ids = np.fromiter((row[0] for row in node_rows), dtype=np.int64)
+    node_ids.sort()
+    edges = np.fromiter((node_id for row in relationship_rows
+                         for node_id in (row[1], row[4])),
+                        dtype=np.int64).reshape(-1, 2)
+
+    rows = np.searchsorted(node_ids, edges[:, 0])
+    cols = np.searchsorted(node_ids, edges[:, 1])
+    data = np.ones(len(edges), dtype=np.int64)
+
+    n = len(node_ids)
+    adjacency = scipy.sparse.coo_matrix((data, (rows, cols)), shape=(n, n))
+    return adjacency.tocsr(), node_ids
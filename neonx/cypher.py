@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+__all__ = ['get_node_statement', 'get_relationship_statement',
+           'get_page_statement', 'get_node_page_query',
+           'get_relationship_page_query', 'get_constraint_statement',
+           'get_merge_node_statement', 'get_merge_relationship_statement']
+
+
+NODE_QRY = """UNWIND {{rows}} AS props CREATE (n{0}) SET n = props \
+RETURN ID(n)"""
+
+RELATIONSHIP_QRY = """UNWIND {{rows}} AS row \
+MATCH (a) WHERE ID(a) = row[0] MATCH (b) WHERE ID(b) = row[1] \
+CREATE (a)-[r:{0}]->(b) SET r = row[2]"""
+
+
+CONSTRAINT_QRY = """CREATE CONSTRAINT ON (n:{0}) ASSERT n.{1} IS UNIQUE"""
+
+MERGE_NODE_QRY = """UNWIND {{rows}} AS row MERGE (n:{0} {{{1}: row[0]}}) \
+SET n += row[1]"""
+
+MERGE_RELATIONSHIP_QRY = """UNWIND {{rows}} AS row \
+MATCH (a:{0} {{{1}: row[0]}}) MATCH (b:{0} {{{1}: row[1]}}) \
+MERGE (a)-[r:{2}]->(b) SET r += row[2]"""
+
+NODE_PAGE_QRY = """MATCH (n:{0}) WHERE ID(n) > {{last}} \
+RETURN ID(n), n ORDER BY ID(n) LIMIT {{limit}}"""
+
+RELATIONSHIP_PAGE_QRY = """MATCH (a:{0})-[r]->(b:{0}) WHERE ID(r) > {{last}} \
+RETURN ID(r), ID(a), TYPE(r), r, ID(b) ORDER BY ID(r) LIMIT {{limit}}"""
+
+
+def quote(name):
+    """quotes a label or a relationship type for use in a Cypher query.
+
+    :param name: a label or a relationship type
+    :rtype: the name enclosed in backticks
+    """
+    return '`{0}`'.format(name.replace('`', '``'))
+
+
+def escape(text):
+    """escapes the braces of `text`, so that it can be inserted into a
+    query which is formatted with `str.format()`.
+
+    :param text: a part of a Cypher query
+    :rtype: the text with doubled braces
+    """
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def get_projection(variable, properties):
+    """creates a Cypher map of some of the properties of a node or a
+    relationship.
+
+    :param variable: the name of the node or relationship, e.g. `'n'`
+    :param properties: a list of property names
+    :rtype: a Cypher map literal
+    """
+    fields = ['{0}: {1}.{0}'.format(quote(name), variable)
+              for name in properties]
+    return '{{{0}}}'.format(', '.join(fields))
+
+
+def get_node_statement(rows, label=None):
+    """creates a Cypher statement which creates a node for every
+    dictionary of properties in `rows`. The statement returns the Neo4j
+    IDs of the nodes in the same order.
+
+    :param rows: a list of dictionaries of node attributes
+    :param label: an optional label to be added to all nodes
+    :rtype: a dictionary representing a statement of the `transactional \
+    endpoint \
+    <http://docs.neo4j.org/chunked/stable/rest-api-transactional.html>_`
+    """
+    node_label = ':' + quote(label) if label else ''
+    return {"statement": NODE_QRY.format(node_label),
+            "parameters": {"rows": rows}}
+
+
+def get_relationship_statement(rows, rel_name):
+    """creates a Cypher statement which creates a relationship for every
+    `[from_id, to_id, properties]` list in `rows`, where the IDs are the
+    Neo4j IDs of existing nodes.
+
+    :param rows: a list of `[from_id, to_id, properties]` lists
+    :param rel_name: string that describes the relationship between the
+        two nodes
+    :rtype: a dictionary representing a statement of the transactional
+        endpoint
+    """
+    return {"statement": RELATIONSHIP_QRY.format(quote(rel_name)),
+            "parameters": {"rows": rows}}
+
+
+def get_constraint_statement(label, key):
+    """creates a Cypher statement which creates a unique constraint, and
+    thereby an index, on the property `key` of the nodes with `label`.
+    Creating a constraint which already exists does nothing.
+
+    :param label: the label of the nodes
+    :param key: the name of the property
+    :rtype: a dictionary representing a statement of the transactional
+        endpoint
+    """
+    return {"statement": CONSTRAINT_QRY.format(quote(label), quote(key)),
+            "parameters": {}}
+
+
+def get_merge_node_statement(rows, label, key):
+    """creates a Cypher statement which creates or updates a node for
+    every `[key_value, properties]` list in `rows`. The nodes are found by
+    their label and the value of the property `key`.
+
+    :param rows: a list of `[key_value, properties]` lists
+    :param label: the label of the nodes
+    :param key: the name of the property which identifies a node
+    :rtype: a dictionary representing a statement of the transactional
+        endpoint
+    """
+    return {"statement": MERGE_NODE_QRY.format(quote(label), quote(key)),
+            "parameters": {"rows": rows}}
+
+
+def get_merge_relationship_statement(rows, label, key, rel_name):
+    """creates a Cypher statement which creates or updates a relationship
+    for every `[from_key, to_key, properties]` list in `rows`. The nodes
+    are found by their label and the value of the property `key`.
+
+    :param rows: a list of `[from_key, to_key, properties]` lists
+    :param label: the label of the nodes
+    :param key: the name of the property which identifies a node
+    :param rel_name: string that describes the relationship between the
+        two nodes
+    :rtype: a dictionary representing a statement of the transactional
+        endpoint
+    """
+    query = MERGE_RELATIONSHIP_QRY.format(quote(label), quote(key),
+                                          quote(rel_name))
+    return {"statement": query, "parameters": {"rows": rows}}
+
+
+def get_page_statement(query, label, last, limit, parameters=None):
+    """creates a Cypher statement which returns the next page of the
+    results of `query`. The pages are ordered by the Neo4j ID in the first
+    column, so that every page is found with the index instead of skipping
+    the preceding ones.
+
+    :param query: `NODE_PAGE_QRY` or `RELATIONSHIP_PAGE_QRY`, or a query of
+        :func:`get_node_page_query` or :func:`get_relationship_page_query`
+    :param label: the label of the nodes
+    :param last: the last ID of the preceding page, or -1
+    :param limit: the maximum number of rows of the page
+    :param optional parameters: a dictionary of further parameters of the
+        query
+    :rtype: a dictionary representing a statement of the transactional
+        endpoint
+    """
+    parameters = dict(parameters or {}, last=last, limit=limit)
+    return {"statement": query.format(quote(label)),
+            "parameters": parameters}
+
+
+def get_node_page_query(properties=None, where=None):
+    """creates a variant of `NODE_PAGE_QRY` which returns only some of the
+    properties of the nodes, and only the nodes which match a condition.
+    The missing properties are returned as `null`.
+
+    :param optional properties: a list of property names
+    :param optional where: a Cypher condition on the node `n`, e.g.
+        `'n.age > {min_age}'`
+    :rtype: a query for :func:`get_page_statement`
+    """
+    query = NODE_PAGE_QRY
+    if where is not None:
+        query = query.replace(' RETURN ', ' AND ({0}) RETURN '.format(
+            escape(where)))
+    if properties is not None:
+        query = query.replace(', n ORDER BY ', ', {0} ORDER BY '.format(
+            escape(get_projection('n', properties))))
+    return query
+
+
+def get_relationship_page_query(properties=None, rel_types=None,
+                                where=None):
+    """creates a variant of `RELATIONSHIP_PAGE_QRY` which returns only some
+    of the properties of the relationships, only relationships of some
+    types, and only relationships between nodes which match a condition.
+    The missing properties are returned as `null`.
+
+    :param optional properties: a list of property names
+    :param optional rel_types: a list of relationship types
+    :param optional where: a Cypher condition on a node `n`, which must
+        hold for both nodes of a relationship
+    :rtype: a query for :func:`get_page_statement`
+    """
+    query = RELATIONSHIP_PAGE_QRY
+    if rel_types is not None:
+        query = query.replace('-[r]->', '-[r:{0}]->'.format(
+            escape('|'.join(quote(rel_type) for rel_type in rel_types))))
+    if where is not None:
+        query = query.replace(' RETURN ', ' AND ALL(n IN [a, b] WHERE ({0})) '
+                              'RETURN '.format(escape(where)))
+    if properties is not None:
+        query = query.replace(', r, ', ', {0}, '.format(
+            escape(get_projection('r', properties))))
+    return query
+
+
+def check_errors(result_json):
+    """checks, if the statements sent to the transactional endpoint were
+    executed without errors. The endpoint reports errors with status 200.
+
+    :param result_json: the decoded answer of the transactional endpoint
+    :rtype: an Exception or None
+    """
+    errors = result_json.get('errors')
+    if not errors:
+        return
+
+    e = Exception(errors[0]['message'])
+    e.args += (errors[0]['code'], )
+    raise e
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+__all__ = ['EncodingCache']
+
+
+CACHE_SIZE = 1024
+
+# the values of a dictionary which is cached. Containers are left out,
+# since e.g. `(1, True)` equals `(1, 1)` but is encoded differently.
+SCALAR_TYPES = tuple(set([type(None), bool, int, type(2 ** 64), float,
+                          type(b''), type(u'')]))
+
+
+class EncodingCache(object):
+    """wraps a JSON encoder and remembers the encodings of dictionaries of
+    properties, so that identical dictionaries (e.g. `{"weight": 1}`) are
+    only encoded once. There is no LRU eviction: when the cache holds
+    `maxsize` encodings, all of them are dropped at once and it fills up
+    again from scratch.
+
+    Only dictionaries of strings, numbers, booleans and None are cached,
+    all others are always encoded.
+
+    :param encoder: a JSONEncoder object
+    :param optional maxsize: the number of encodings which are kept
+    """
+
+    def __init__(self, encoder, maxsize=CACHE_SIZE):
+        self.encoder = encoder
+        self.maxsize = maxsize
+        self.cache = {}
+
+    def encode(self, properties):
+        """encodes `properties` like `JSONEncoder.encode()`.
+
+        :param properties: a dictionary of attributes
+        :rtype: a JSON encoded string
+        """
+        # the types are part of the key, since 1, 1.0 and True are equal
+        # but are encoded differently
+        key = []
+        for name, value in properties.items():
+            if value.__class__ not in SCALAR_TYPES:
+                return self.encoder.encode(properties)
+            key.append((name, value.__class__, value))
+        key = tuple(key)
+
+        encoded = self.cache.get(key)
+        if encoded is None:
+            encoded = self.encoder.encode(properties)
+            if len(self.cache) >= self.maxsize:
+                self.cache.clear()
+            self.cache[key] = encoded
+        return encoded
@@ -1,12 +1,25 @@
 
 # -*- coding: utf-8 -*-
 
+import functools
+import gzip
 import json
 
 import networkx as nx
 
+from .encoding import EncodingCache
+from .parallel import CHUNK_SIZE, start_pool, imap, get_worker_encoder
+from .utils import (UNDIRECTED_MODES, chunked, iter_edges, iter_encoded_edges,
+                    strip_reverse_edges)
 
-__all__ = ['get_geoff']
+
+__all__ = ['get_geoff', 'iter_geoff', 'write_geoff', 'iter_geoff_stream',
+           'write_geoff_stream', 'parse_geoff', 'read_geoff']
+
+
+BUFFER_SIZE = 64 * 1024
+EDGE_START = ')-[:'
+EDGE_END = ']->('
 
 
 def get_node(node_name, properties, encoder):
@@ -37,19 +50,167 @@ def get_edge(from_node, to_node, properties, edge_relationship_name, encoder):
         `json.JSONEncoder`)
     :rtype: A Geoff string
     """
-    edge_string = None
+    return format_edge(from_node, to_node,
+                       encode_edge_properties(encoder, properties),
+                       edge_relationship_name)
+
+
+def encode_edge_properties(encoder, properties):
+    """encodes the attributes of an edge for :func:`format_edge`.
+
+    :param encoder: an instance of a JSON encoder
+    :param properties: a dictionary of edge attributes
+    :rtype: a JSON encoded string, or None if there are no attributes
+    """
     if properties:
-        args = [from_node, edge_relationship_name,
-                encoder.encode(properties), to_node]
-        edge_string = '({0})-[:{1} {2}]->({3})'.format(*args)
-    else:
-        args = [from_node, edge_relationship_name, to_node]
-        edge_string = '({0})-[:{1}]->({2})'.format(*args)
+        return encoder.encode(properties)
+    return None
+
+
+def format_edge(from_node, to_node, encoded, edge_relationship_name):
+    """converts an edge with encoded attributes into a Geoff string.
+
+    :param from_node: the ID of a NetworkX source node
+    :param to_node: the ID of a NetworkX target node
+    :param encoded: the result of :func:`encode_edge_properties`
+    :param edge_relationship_name: string that describes the
+        relationship between the two nodes
+    :rtype: A Geoff string
+    """
+    if encoded is not None:
+        args = [from_node, edge_relationship_name, encoded, to_node]
+        return '({0})-[:{1} {2}]->({3})'.format(*args)
+    args = [from_node, edge_relationship_name, to_node]
+    return '({0})-[:{1}]->({2})'.format(*args)
+
+
+def iter_geoff(graph, edge_rel_name, encoder=None, undirected='both'):
+    """ Iterate over the lines of the Geoff string of `graph`, without
+    building the whole string. See :func:`get_geoff`.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param edge_rel_name: Relationship name between the nodes
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`.
+    :rtype: An iterator of Geoff lines
+    """
+
+    if undirected not in UNDIRECTED_MODES:
+        raise ValueError("Unknown undirected mode: {0}".format(undirected))
+    return iter_geoff_stream(graph.nodes(data=True),
+                             iter_edges(graph, undirected), edge_rel_name,
+                             encoder)
+
+
+def iter_geoff_stream(nodes, edges, edge_rel_name, encoder=None):
+    """ Iterate over the Geoff lines of a graph which is given as a stream
+    of nodes and a stream of edges instead of a NetworkX graph, e.g. read
+    from an edge list file or a database cursor. Neither is held in
+    memory::
+
+        from neonx import iter_geoff_stream
+
+        nodes = ((row[0], {'name': row[1]}) for row in cursor)
+        edges = ((a, b, {}) for a, b in edge_list)
+        for line in iter_geoff_stream(nodes, edges, 'LINKS_TO'):
+            print(line)
+
+    Every edge becomes a single relationship from the first to the second
+    node.
+
+    :param nodes: An iterable of `(node_name, properties)` tuples, like
+        `graph.nodes(data=True)`
+    :param edges: An iterable of `(from_node, to_node, properties)`
+        tuples, like `graph.edges(data=True)`
+    :param edge_rel_name: Relationship name between the nodes
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :rtype: An iterator of Geoff lines
+    """
+
+    if encoder is None:
+        encoder = json.JSONEncoder()
+    encoder = EncodingCache(encoder)
+
+    for node_name, properties in nodes:
+        yield get_node(node_name, properties, encoder)
+
+    encode = functools.partial(encode_edge_properties, encoder)
+    for from_node, to_node, encoded in iter_encoded_edges(edges, encode):
+        yield format_edge(from_node, to_node, encoded, edge_rel_name)
+
+
+def encode_node_block(rows):
+    """converts a block of nodes into Geoff lines in a worker process,
+    see :func:`iter_geoff_blocks`.
+
+    :param rows: a list of `(node_name, properties)` tuples
+    :rtype: the Geoff lines, separated by newlines
+    """
+    encoder = get_worker_encoder()
+    return '\n'.join(get_node(node_name, properties, encoder)
+                     for node_name, properties in rows)
+
+
+def encode_edge_block(task):
+    """converts a block of edges into Geoff lines in a worker process,
+    see :func:`iter_geoff_blocks`.
+
+    :param task: a tuple of the relationship name and a list of
+        `(from_node, to_node, properties)` tuples, see
+        :func:`neonx.utils.strip_reverse_edges`
+    :rtype: the Geoff lines, separated by newlines
+    """
+    edge_rel_name, rows = task
+    encode = functools.partial(encode_edge_properties, get_worker_encoder())
+    return '\n'.join(format_edge(from_node, to_node, encoded, edge_rel_name)
+                     for from_node, to_node, encoded
+                     in iter_encoded_edges(rows, encode))
+
+
+def iter_geoff_blocks(graph, edge_rel_name, encoder, undirected, processes,
+                      chunk_size=CHUNK_SIZE):
+    """iterates over blocks of the lines of :func:`iter_geoff`, which are
+    converted by `processes` worker processes in parallel. The blocks are
+    in the same order as the lines.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param edge_rel_name: Relationship name between the nodes
+    :param encoder: a picklable JSONEncoder object
+    :param undirected: `'both'` or `'single'`
+    :param processes: the number of worker processes
+    :param optional chunk_size: the number of lines per block
+    :rtype: An iterator of Geoff lines, separated by newlines
+    """
+    edges = iter_edges(graph, undirected)
+    pool = start_pool(processes, encoder)
+    try:
+        for block in imap(pool, encode_node_block,
+                          chunked(graph.nodes(data=True), chunk_size),
+                          2 * processes):
+            yield block
+
+        tasks = ((edge_rel_name, strip_reverse_edges(chunk))
+                 for chunk in chunked(edges, chunk_size))
+        for block in imap(pool, encode_edge_block, tasks, 2 * processes):
+            yield block
+    finally:
+        pool.terminate()
 
-    return edge_string
 
+def iter_lines(graph, edge_rel_name, encoder, undirected, processes):
+    """iterates over the lines of :func:`iter_geoff`, or over blocks of
+    them if `processes` is present."""
+    if not processes:
+        return iter_geoff(graph, edge_rel_name, encoder, undirected)
+    if encoder is None:
+        encoder = json.JSONEncoder()
+    return iter_geoff_blocks(graph, edge_rel_name, encoder, undirected,
+                             processes)
 
-def get_geoff(graph, edge_rel_name, encoder=None):
+
+def get_geoff(graph, edge_rel_name, encoder=None, undirected='both',
+              processes=None):
     """ Get the `graph` as Geoff string. The edges between the nodes
     have relationship name `edge_rel_name`. The code
     below shows a simple example::
@@ -71,25 +232,205 @@ def get_geoff(graph, edge_rel_name, encoder=None):
     class. See `JSONEncoder
     <http://docs.python.org/2/library/json.html#json.JSONEncoder/>`_.
 
+    Every edge of an undirected graph becomes two relationships, one in
+    each direction, unless `undirected` is `'single'`.
+
+    If `processes` is present, the nodes and edges are converted in blocks
+    by that many worker processes. This pays off for graphs with millions
+    of edges. A custom encoder must then be picklable.
+
     :param graph: A NetworkX Graph or a DiGraph
     :param edge_rel_name: Relationship name between the nodes
     :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`.
+    :param optional processes: Number of worker processes.
     :rtype: A Geoff string
     """
 
-    if encoder is None:
-        encoder = json.JSONEncoder()
-    is_digraph = isinstance(graph, nx.DiGraph)
+    return '\n'.join(iter_lines(graph, edge_rel_name, encoder, undirected,
+                                processes))
+
+
+def write_geoff(graph, fileobj, edge_rel_name, encoder=None,
+                compress=False, undirected='both', processes=None):
+    """ Write the `graph` as Geoff to the file-like object `fileobj`,
+    line by line. Only a small buffer of lines is kept in memory, so this
+    works for graphs whose Geoff string would not fit into memory::
+
+        from neonx import write_geoff
+
+        with open('graph.geoff.gz', 'wb') as f:
+            write_geoff(G, f, 'LINKS_TO', compress=True)
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param fileobj: A file-like object opened in binary mode
+    :param edge_rel_name: Relationship name between the nodes
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional compress: If true, the output is gzip compressed.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`.
+    :param optional processes: Number of worker processes, see
+        :func:`get_geoff`.
+    """
+
+    lines = iter_lines(graph, edge_rel_name, encoder, undirected, processes)
+    write_lines(lines, fileobj, compress)
+
+
+def write_geoff_stream(nodes, edges, fileobj, edge_rel_name, encoder=None,
+                       compress=False):
+    """ Write the Geoff lines of a stream of nodes and a stream of edges to
+    the file-like object `fileobj`, without building a NetworkX graph. See
+    :func:`iter_geoff_stream` and :func:`write_geoff`.
+
+    :param nodes: An iterable of `(node_name, properties)` tuples
+    :param edges: An iterable of `(from_node, to_node, properties)` tuples
+    :param fileobj: A file-like object opened in binary mode
+    :param edge_rel_name: Relationship name between the nodes
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional compress: If true, the output is gzip compressed.
+    """
+
+    write_lines(iter_geoff_stream(nodes, edges, edge_rel_name, encoder),
+                fileobj, compress)
+
 
-    lines = []
-    lapp = lines.append
-    for node_name, properties in graph.nodes(data=True):
-        lapp(get_node(node_name, properties, encoder))
+def write_lines(lines, fileobj, compress=False):
+    """writes Geoff lines, or blocks of them, to `fileobj`, separated by
+    newlines. Only a small buffer of lines is kept in memory.
 
-    for from_node, to_node, properties in graph.edges(data=True):
-        lapp(get_edge(from_node, to_node, properties, edge_rel_name, encoder))
-        if not is_digraph:
-            lapp(get_edge(to_node, from_node, properties, edge_rel_name,
-                          encoder))
+    :param lines: an iterable of Geoff lines
+    :param fileobj: a file-like object opened in binary mode
+    :param optional compress: if true, the output is gzip compressed
+    """
+    if compress:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode='wb')
+
+    buf = []
+    size = 0
+    for i, line in enumerate(lines):
+        if i:
+            line = '\n' + line
+        buf.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            fileobj.write(''.join(buf).encode('utf-8'))
+            buf = []
+            size = 0
+
+    fileobj.write(''.join(buf).encode('utf-8'))
+    fileobj.flush()
+
+    if compress:
+        fileobj.close()
+
+
+def parse_geoff(lines, create_using=None, nodetype=None, decoder=None):
+    """ Build a graph from Geoff lines, as written by :func:`get_geoff`,
+    one line at a time::
+
+        from neonx import parse_geoff
+
+        graph = parse_geoff(geoff_string.splitlines(), nodetype=int)
+
+    Every `(name {...})` line becomes a node and every
+    `(a)-[:REL {...}]->(b)` line an edge, whose relationship name is
+    stored in its attribute `neo_rel_name`, as by
+    :func:`neonx.get_neo_graph`. Empty lines and lines starting with `#`
+    are skipped.
+
+    If `create_using` is an undirected graph (e.g. `nx.Graph()`), the two
+    relationships which :func:`get_geoff` writes for every undirected edge
+    are collapsed into one edge again.
+
+    The node names are strings, unless `nodetype` converts them (e.g.
+    `int`).
+
+    :param lines: An iterable of Geoff lines, as strings or UTF-8
+        encoded bytes
+    :param optional create_using: The NetworkX graph to add the nodes and
+        edges to. Defaults to a new DiGraph.
+    :param optional nodetype: A function which converts the node names.
+    :param optional decoder: JSONDecoder object. Defaults to JSONDecoder.
+    :rtype: A `Digraph \
+<http://networkx.github.io/documentation/latest/\
+reference/classes.digraph.html>`_, or `create_using`.
+    """
+
+    graph = nx.DiGraph() if create_using is None else create_using
+    decode = (decoder or json.JSONDecoder()).decode
+
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+
+        try:
+            if line[0] != '(' or line[-1] != ')':
+                raise ValueError(line)
+
+            # the properties of a node may contain EDGE_START as well, but
+            # only after the end of its name
+            i = line.find(EDGE_START)
+            j = line.find(' {')
+            if i < 0 or 0 <= j < i:
+                if j < 0:
+                    node_name, properties = line[1:-1], {}
+                else:
+                    node_name, properties = line[1:j], decode(line[j + 1:-1])
+                if nodetype is not None:
+                    node_name = nodetype(node_name)
+                graph.add_node(node_name, **properties)
+                continue
+
+            j = line.rfind(EDGE_END)
+            if j < i:
+                raise ValueError(line)
+            from_node, to_node = line[1:i], line[j + 4:-1]
+            rel_name = line[i + 4:j]
+            k = rel_name.find(' ')
+            if k < 0:
+                properties = {}
+            else:
+                properties = decode(rel_name[k + 1:])
+                rel_name = rel_name[:k]
+            properties['neo_rel_name'] = rel_name
+            if nodetype is not None:
+                from_node, to_node = nodetype(from_node), nodetype(to_node)
+            graph.add_edge(from_node, to_node, **properties)
+        except ValueError as e:
+            raise ValueError("Invalid Geoff in line {0}: {1}".format(
+                number, e))
+
+    return graph
+
+
+def read_geoff(fileobj, create_using=None, nodetype=None, decoder=None,
+               compress=False):
+    """ Read a graph from a Geoff file, as written by :func:`write_geoff`,
+    line by line. Only the graph is held in memory::
+
+        from neonx import read_geoff
+
+        with open('graph.geoff.gz', 'rb') as f:
+            G = read_geoff(f, nx.Graph(), nodetype=int, compress=True)
+
+    See :func:`parse_geoff` for the options.
+
+    :param fileobj: A file-like object opened in binary mode
+    :param optional create_using: The NetworkX graph to add the nodes and
+        edges to. Defaults to a new DiGraph.
+    :param optional nodetype: A function which converts the node names.
+    :param optional decoder: JSONDecoder object. Defaults to JSONDecoder.
+    :param optional compress: If true, the input is gzip compressed.
+    :rtype: A `Digraph \
+<http://networkx.github.io/documentation/latest/\
+reference/classes.digraph.html>`_, or `create_using`.
+    """
 
-    return '\n'.join(lines)
+    if compress:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode='rb')
+    return parse_geoff(fileobj, create_using, nodetype, decoder)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import array
+
+__all__ = ['NodeIndex', 'get_node_index']
+
+
+NODE_INDEXES = ('dict', 'compact')
+
+try:
+    array.array('q')
+    LONG_TYPECODE = 'q'
+except ValueError:
+    # Python 2 has no 'q'
+    LONG_TYPECODE = 'l'
+
+
+class NodeIndex(object):
+    """A read-only mapping of node names to their positions in `nodes`,
+    which needs far less memory than a dictionary. It is an open
+    addressing hash table of the positions, stored in an array of machine
+    integers, and a list of the names. The name objects themselves are not
+    copied. A list passed as `nodes` is taken over as it is, so the caller
+    must not change it afterwards. With half of the slots free, a lookup
+    needs two probes on average.
+
+    If the names are the integers `0, 1, 2, ...` in order, e.g. after
+    `nx.convert_node_labels_to_integers()`, no table is needed at all. A
+    repeated name maps to its last position, as in a dictionary.
+
+    :param nodes: a list of node names, or any other iterable of them,
+        e.g. a NetworkX graph
+    """
+
+    def __init__(self, nodes):
+        self.names = nodes if nodes.__class__ is list else list(nodes)
+        self.table = None
+
+        if all(name.__class__ is int and name == i
+               for i, name in enumerate(self.names)):
+            return
+
+        size = 2
+        while size < 2 * len(self.names):
+            size *= 2
+        self.mask = size - 1
+
+        typecode = 'i' if len(self.names) < 2 ** 31 else LONG_TYPECODE
+        table = self.table = array.array(typecode, [-1]) * size
+        mask = self.mask
+        for position, name in enumerate(self.names):
+            i = hash(name) & mask
+            while table[i] != -1 and self.names[table[i]] != name:
+                i = (i + 1) & mask
+            table[i] = position
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, name):
+        if self.table is None:
+            if name.__class__ is int and 0 <= name < len(self.names):
+                return name
+            raise KeyError(name)
+
+        table = self.table
+        mask = self.mask
+        i = hash(name) & mask
+        while True:
+            position = table[i]
+            if position == -1:
+                raise KeyError(name)
+            if self.names[position] == name:
+                return position
+            i = (i + 1) & mask
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+
+def get_node_index(nodes, node_index='dict'):
+    """maps the node names in `nodes` to their positions.
+
+    :param nodes: an iterable of node names, e.g. a NetworkX graph
+    :param optional node_index: `'dict'` for a dictionary or `'compact'`
+        for a :class:`NodeIndex`
+    :rtype: a dictionary or a NodeIndex
+    """
+    if node_index == 'dict':
+        return dict((name, i) for i, name in enumerate(nodes))
+    elif node_index == 'compact':
+        return NodeIndex(nodes)
+    raise ValueError("Unknown node index: {0}".format(node_index))
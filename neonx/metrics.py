@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+__all__ = ['MetricsRecorder']
+
+
+class Meter(object):
+    """iterates over the fragments of a streamed request body and measures
+    the time spent encoding them and their total length (in bytes for the
+    byte strings of :func:`neonx.neo.iter_json_array`). The time spent
+    sending them is not included.
+
+    :param fragments: an iterable of strings
+    """
+
+    def __init__(self, fragments):
+        self.fragments = iter(fragments)
+        self.seconds = 0.0
+        self.size = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.time()
+        try:
+            fragment = next(self.fragments)
+        finally:
+            self.seconds += time.time() - start
+        self.size += len(fragment)
+        return fragment
+
+    next = __next__
+
+
+class MetricsRecorder(object):
+    """A metrics sink which adds up the measurements of every phase of the
+    calls of a :class:`neonx.NeoClient`::
+
+        from neonx import MetricsRecorder, write_to_neo
+
+        metrics = MetricsRecorder()
+        write_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                     'Node', metrics=metrics)
+        print(metrics.totals['request'])
+
+    `totals` maps every phase to a dictionary with the number of
+    measurements (`calls`), their total duration in seconds (`seconds`) and
+    the sums of their counts (e.g. `request_bytes`). It can be used from
+    several threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def __call__(self, phase, seconds, **counts):
+        """adds a measurement.
+
+        :param phase: the name of the phase, e.g. `'request'`
+        :param seconds: the duration of the phase
+        :param counts: the numbers of entities or bytes of the phase
+        """
+        with self.lock:
+            total = self.totals.setdefault(phase, {'calls': 0,
+                                                   'seconds': 0.0})
+            total['calls'] += 1
+            total['seconds'] += seconds
+            for name, count in counts.items():
+                total[name] = total.get(name, 0) + count
@@ -1,16 +1,57 @@
 
 # -*- coding: utf-8 -*-
 
+import array
+import collections
+import itertools
 import json
+import threading
+import time
+import zlib
+from multiprocessing.pool import ThreadPool
 
 import networkx as nx
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.exceptions import NewConnectionError
 
-__all__ = ['write_to_neo', 'get_neo_graph']
+from .adaptive import AdaptiveBatchSize
+from .checkpoint import Checkpoint
+from .cypher import (get_node_statement, get_relationship_statement,
+                     get_page_statement, get_constraint_statement,
+                     get_merge_node_statement,
+                     get_merge_relationship_statement, check_errors,
+                     get_node_page_query, get_relationship_page_query)
+from .columnar import get_arrays, get_sparse
+from .encoding import EncodingCache
+from .index import LONG_TYPECODE, NODE_INDEXES, get_node_index
+from .metrics import Meter
+from .parallel import CHUNK_SIZE, start_pool, imap, get_worker_encoder
+from .store import NodeIdStore
+from .utils import (UNDIRECTED_MODES, chunked, iter_edges, iter_encoded_edges,
+                    strip_reverse_edges)
+
+__all__ = ['NeoClient', 'write_to_neo', 'write_stream_to_neo',
+           'add_edges_to_neo', 'get_neo_graph']
 
 
 JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
 HEADERS = {'content-type': JSON_CONTENT_TYPE}
+BUFFER_SIZE = 64 * 1024
+DISCOVERY_TTL = 300
+POOL_SIZE = 10
+DEFAULT_BATCH_SIZE = 10000
+BACKOFF = 1.0
+PAGE_SIZE = 100000
+WRITE_OUTPUTS = ('resources', 'node_ids', 'ids')
+COMPRESSION_LEVEL = 6
+COMPRESSIONS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+# the JSON encodings of `get_node()`, `get_label()` and `get_relationship()`
+NODE_JSON = '{{"method": "POST", "to": "/node", "id": {0}, "body": {1}}}'
+LABEL_JSON = '{{"method": "POST", "to": "{{{0}}}/labels", "body": {1}}}'
+RELATIONSHIP_JSON = ('{{"method": "POST", "to": "{{{0}}}/relationships", '
+                     '"body": {{"to": "{{{1}}}", "type": {2}, "data": {3}}}}}')
 
 
 def get_node(node_id, properties):
@@ -44,6 +85,25 @@ def get_relationship(from_id, to_id, rel_name, properties):
             "body": body}
 
 
+def get_node_relationship(from_id, to_id, rel_name, properties):
+    """reformats a NetworkX edge between two nodes which already exist in
+    Neo4j.
+
+    :param from_id: the Neo4j ID of the source node
+    :param to_id: the Neo4j ID of the target node
+    :param rel_name: string that describes the relationship between the
+        two nodes
+    :param properties: a dictionary of edge attributes
+    :rtype: a dictionary representing a Neo4j POST request
+    """
+    body = {"to": "/node/{0}".format(to_id), "type": rel_name,
+            "data": properties}
+
+    return {"method": "POST",
+            "to": "/node/{0}/relationships".format(from_id),
+            "body": body}
+
+
 def get_label(i, label):
     """adds a label to the given (Neo4j) node.
 
@@ -56,7 +116,324 @@ def get_label(i, label):
             "body": label}
 
 
-def generate_data(graph, edge_rel_name, label, encoder):
+def get_node_id(item):
+    """extracts the Neo4j ID of a node created by a batch operation.
+
+    :param item: an element of a Neo4j batch response
+    :rtype: an integer
+    """
+    return int(item['location'].rpartition('/')[-1])
+
+
+def get_present(properties):
+    """removes the properties which are `null`, as returned by a projection
+    for missing properties.
+
+    :param properties: a dictionary of properties
+    :rtype: a dictionary of the present properties
+    """
+    return dict((name, value) for name, value in properties.items()
+                if value is not None)
+
+
+def get_results(output, nodes, node_ids, relationships):
+    """builds the return value of :func:`write_to_neo` in the form chosen
+    by `output`. The created relationships are consumed one by one, so
+    that only their IDs are kept unless `output` is `'resources'`.
+
+    :param output: `'resources'`, `'node_ids'` or `'ids'`
+    :param nodes: a list of the created node and label resources
+    :param node_ids: a dictionary which maps the node names to their
+        Neo4j IDs
+    :param relationships: an iterable of the created relationship
+        resources
+    :rtype: a list of resources, a dictionary of node IDs, or a tuple of
+        a dictionary of node IDs and an array of relationship IDs
+    """
+    if output == 'resources':
+        nodes.extend(relationships)
+        return nodes
+
+    relationship_ids = array.array(LONG_TYPECODE)
+    for item in relationships:
+        if output == 'ids':
+            relationship_ids.append(get_node_id(item))
+    if output == 'node_ids':
+        return node_ids
+    return node_ids, relationship_ids
+
+
+def iter_encoded_entities(graph, edge_rel_name, label, encoder,
+                          undirected='both', node_index='dict'):
+    """iterates over the JSON encoded Neo4j batch operations which create
+    `graph`. Identical dictionaries of attributes are only encoded once.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param label: an optional label to be added to all nodes
+    :param encoder: a JSONEncoder object
+    :param optional undirected: `'both'` or `'single'`, see `iter_edges()`
+    :param optional node_index: `'dict'` or `'compact'`, see
+        :func:`neonx.index.get_node_index`
+    :rtype: an iterator of JSON encoded Neo4j POST requests
+    """
+    cache = EncodingCache(encoder)
+
+    for i, (_, properties) in enumerate(graph.nodes(data=True)):
+        yield NODE_JSON.format(i, cache.encode(properties))
+
+    # the batch index of a node is its position in the graph
+    nodes = get_node_index(graph, node_index)
+
+    if label:
+        label = encoder.encode(label)
+        for i in range(len(nodes)):
+            yield LABEL_JSON.format(i, label)
+
+    rel_name = encoder.encode(edge_rel_name)
+    edges = iter_encoded_edges(iter_edges(graph, undirected), cache.encode)
+    for from_node, to_node, encoded in edges:
+        yield RELATIONSHIP_JSON.format(nodes[from_node], nodes[to_node],
+                                       rel_name, encoded)
+
+
+def iter_stream_entities(nodes, edges, edge_rel_name, label, encoder,
+                         node_index='dict'):
+    """iterates over the JSON encoded Neo4j batch operations which create
+    the streamed `nodes` and `edges`, like :func:`iter_encoded_entities`.
+    Only the batch indices of the node names are held in memory.
+
+    :param nodes: an iterable of `(node_name, properties)` tuples
+    :param edges: an iterable of `(from_node, to_node, properties)` tuples
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param label: an optional label to be added to all nodes
+    :param encoder: a JSONEncoder object
+    :param optional node_index: `'dict'` or `'compact'`, see
+        :func:`neonx.index.get_node_index`
+    :rtype: an iterator of JSON encoded Neo4j POST requests
+    """
+    cache = EncodingCache(encoder)
+
+    # the batch index of a node is its position in the stream, a
+    # duplicate name refers to its last node
+    indices = {}
+    names = []
+    count = 0
+    for i, (node_name, properties) in enumerate(nodes):
+        yield NODE_JSON.format(i, cache.encode(properties))
+        if node_index == 'dict':
+            indices[node_name] = i
+        else:
+            names.append(node_name)
+        count = i + 1
+
+    if node_index != 'dict':
+        indices = get_node_index(names, node_index)
+        del names
+
+    if label:
+        label = encoder.encode(label)
+        for i in range(count):
+            yield LABEL_JSON.format(i, label)
+
+    rel_name = encoder.encode(edge_rel_name)
+    for from_node, to_node, encoded in iter_encoded_edges(edges,
+                                                          cache.encode):
+        yield RELATIONSHIP_JSON.format(indices[from_node], indices[to_node],
+                                       rel_name, encoded)
+
+
+def encode_node_block(task):
+    """encodes a block of nodes in a worker process, see
+    :func:`iter_parallel_entities`.
+
+    :param task: a tuple of the index of the first node and a list of
+        dictionaries of node attributes
+    :rtype: the comma separated JSON encoded batch operations
+    """
+    start, rows = task
+    encoder = get_worker_encoder()
+    return ', '.join(NODE_JSON.format(start + i, encoder.encode(properties))
+                     for i, properties in enumerate(rows))
+
+
+def encode_relationship_block(task):
+    """encodes a block of relationships in a worker process, see
+    :func:`iter_parallel_entities`.
+
+    :param task: a tuple of the JSON encoded relationship name and a list
+        of `(from_index, to_index, properties)` tuples, see
+        :func:`neonx.utils.strip_reverse_edges`
+    :rtype: the comma separated JSON encoded batch operations
+    """
+    rel_name, rows = task
+    encoder = get_worker_encoder()
+    return ', '.join(RELATIONSHIP_JSON.format(from_index, to_index, rel_name,
+                                              encoded)
+                     for from_index, to_index, encoded
+                     in iter_encoded_edges(rows, encoder.encode))
+
+
+def iter_parallel_entities(nodes, edges, edge_rel_name, label, encoder,
+                           processes, chunk_size=CHUNK_SIZE,
+                           node_index='dict'):
+    """iterates over the same JSON encoded Neo4j batch operations as
+    :func:`iter_stream_entities`, but encodes the nodes and relationships
+    in blocks of `chunk_size` with `processes` worker processes. The
+    batch indices of the nodes are assigned here, so they are the same as
+    without workers.
+
+    :param nodes: an iterable of `(node_name, properties)` tuples
+    :param edges: an iterable of `(from_node, to_node, properties)` tuples
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param label: an optional label to be added to all nodes
+    :param encoder: a picklable JSONEncoder object
+    :param processes: the number of worker processes
+    :param optional chunk_size: the number of operations per block
+    :param optional node_index: `'dict'` or `'compact'`, see
+        :func:`neonx.index.get_node_index`
+    :rtype: an iterator of comma separated JSON encoded Neo4j POST
+        requests
+    """
+    names = []
+    indices = None
+
+    def node_tasks():
+        for chunk in chunked(nodes, chunk_size):
+            yield len(names), [properties for _, properties in chunk]
+            names.extend(node_name for node_name, _ in chunk)
+
+    rel_name = encoder.encode(edge_rel_name)
+
+    def relationship_tasks():
+        for chunk in chunked(edges, chunk_size):
+            yield rel_name, [(indices[from_node], indices[to_node],
+                              properties)
+                             for from_node, to_node, properties
+                             in strip_reverse_edges(chunk)]
+
+    pool = start_pool(processes, encoder)
+    try:
+        for block in imap(pool, encode_node_block, node_tasks(),
+                          2 * processes):
+            yield block
+
+        # the index takes over the list of names
+        count = len(names)
+        indices = get_node_index(names, node_index)
+        names = None
+
+        if label:
+            label = encoder.encode(label)
+            for i in range(count):
+                yield LABEL_JSON.format(i, label)
+
+        for block in imap(pool, encode_relationship_block,
+                          relationship_tasks(), 2 * processes):
+            yield block
+    finally:
+        pool.terminate()
+
+
+def iter_json_array(fragments, buffer_size=BUFFER_SIZE):
+    """joins JSON encoded `fragments` to a JSON array piece by piece, so
+    that the whole array never has to be held in memory.
+
+    :param fragments: an iterable of JSON encoded strings
+    :param optional buffer_size: the approximate size of each piece
+    :rtype: an iterator of UTF-8 encoded byte strings
+    """
+    pieces = []
+    size = 0
+    separator = '['
+
+    for fragment in fragments:
+        fragment = separator + fragment
+        separator = ', '
+        pieces.append(fragment)
+        size += len(fragment)
+        if size >= buffer_size:
+            yield ''.join(pieces).encode('utf-8')
+            pieces = []
+            size = 0
+
+    if separator == '[':
+        pieces.append(separator)
+    pieces.append(']')
+    yield ''.join(pieces).encode('utf-8')
+
+
+def iter_data(graph, edge_rel_name, label, encoder, undirected='both',
+              processes=None, node_index='dict'):
+    """converts a NetworkX graph into a format that can be uploaded to
+    Neo4j using a single HTTP POST request with a chunked body.
+
+    :rtype: an iterator of UTF-8 encoded fragments of `Neo4j batch \
+    operations \
+    <http://docs.neo4j.org/chunked/stable/rest-api-batch-ops.html>_`.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param label: an optional label to be added to all nodes
+    :param encoder: a JSONEncoder object
+    :param optional undirected: `'both'` or `'single'`, see `iter_edges()`
+    :param optional processes: the number of worker processes which
+        encode the operations, see :func:`iter_parallel_entities`
+    :param optional node_index: `'dict'` or `'compact'`, see
+        :func:`neonx.index.get_node_index`
+    """
+    if processes:
+        entities = iter_parallel_entities(graph.nodes(data=True),
+                                          iter_edges(graph, undirected),
+                                          edge_rel_name, label, encoder,
+                                          processes, node_index=node_index)
+    else:
+        entities = iter_encoded_entities(graph, edge_rel_name, label,
+                                         encoder, undirected, node_index)
+    return iter_json_array(entities)
+
+
+def iter_compressed(fragments, compressor):
+    """compresses a streamed request body piece by piece.
+
+    :param fragments: an iterable of UTF-8 encoded byte strings
+    :param compressor: a `zlib` compression object
+    :rtype: an iterator of compressed byte strings
+    """
+    for fragment in fragments:
+        compressed = compressor.compress(fragment)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def compress_data(data, compression):
+    """compresses a request body with gzip or deflate. A string is
+    compressed at once, an iterator while it is being sent.
+
+    :param data: a JSON encoded string or an iterator of its UTF-8
+        encoded fragments
+    :param compression: `'gzip'` or `'deflate'`
+    :rtype: a compressed byte string or an iterator of its pieces
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression: {0}".format(compression))
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED,
+                                  COMPRESSIONS[compression])
+
+    if isinstance(data, type(u'')):
+        data = data.encode('utf-8')
+    if isinstance(data, type(b'')):
+        return compressor.compress(data) + compressor.flush()
+    return iter_compressed(data, compressor)
+
+
+def generate_data(graph, edge_rel_name, label, encoder, undirected='both',
+                  processes=None, node_index='dict'):
     """converts a NetworkX graph into a format that can be uploaded to
     Neo4j using a single HTTP POST request.
 
@@ -68,36 +445,69 @@ def generate_data(graph, edge_rel_name, label, encoder):
         the two nodes
     :param label: an optional label to be added to all nodes
     :param encoder: a JSONEncoder object
+    :param optional undirected: `'both'` or `'single'`, see `iter_edges()`
+    :param optional processes: the number of worker processes which
+        encode the operations. This pays off for graphs with millions of
+        edges. The encoder must be picklable.
+    :param optional node_index: `'compact'` to look up the batch indices
+        of the nodes in a :class:`neonx.index.NodeIndex`, which needs a
+        fraction of the memory of the default `'dict'` for graphs with
+        millions of nodes, at the cost of slower lookups.
     """
-    is_digraph = isinstance(graph, nx.DiGraph)
-    entities = []
-    nodes = {}
+    data = iter_data(graph, edge_rel_name, label, encoder, undirected,
+                     processes, node_index)
+    return b''.join(data).decode('utf-8')
 
-    for i, (node_name, properties) in enumerate(graph.nodes(data=True)):
-        entities.append(get_node(i, properties))
-        nodes[node_name] = i
 
-    if label:
-        for i in nodes.values():
-            entities.append(get_label(i, label))
+def generate_node_chunks(nodes, label, batch_size):
+    """converts the nodes of a NetworkX graph into a sequence of Neo4j batch
+    operations with at most `batch_size` operations each. The label of a
+    node refers to it by its batch index, so both are always in the same
+    chunk: with a label, a `batch_size` below 2 still yields chunks of one
+    node and its label, i.e. 2 operations.
 
-    for from_node, to_node, properties in graph.edges(data=True):
-        edge = get_relationship(nodes[from_node], nodes[to_node],
-                                edge_rel_name, properties)
-        entities.append(edge)
+    :param nodes: an iterable of `(node_name, properties)` tuples, e.g.
+        `graph.nodes(data=True)`
+    :param label: an optional label to be added to all nodes
+    :param batch_size: the maximum number of operations in a chunk
+    :rtype: an iterator of `(node_names, entities)` tuples, where
+        `node_names` are the NetworkX nodes created by the chunk
+    """
+    node_batch_size = max(batch_size // 2, 1) if label else batch_size
 
-        if not is_digraph:
-            reverse_edge = get_relationship(nodes[to_node],
-                                            nodes[from_node],
-                                            edge_rel_name, properties)
-            entities.append(reverse_edge)
+    for chunk in chunked(nodes, node_batch_size):
+        entities = [get_node(i, properties)
+                    for i, (_, properties) in enumerate(chunk)]
+        if label:
+            entities.extend(get_label(i, label) for i in range(len(chunk)))
+        yield [node_name for node_name, _ in chunk], entities
 
-    return encoder.encode(entities)
+
+def generate_relationship_chunks(edges, edge_rel_name, batch_size,
+                                 node_ids):
+    """converts the edges of a NetworkX graph into a sequence of Neo4j batch
+    operations with at most `batch_size` operations each. The
+    relationships refer to nodes which already exist in Neo4j.
+
+    :param edges: an iterable of `(from_node, to_node, properties)`
+        tuples, e.g. from `iter_edges()`
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param batch_size: the maximum number of operations in a chunk
+    :param node_ids: a dictionary which maps the NetworkX nodes to their
+        Neo4j IDs
+    :rtype: an iterator of lists of batch operations
+    """
+    for chunk in chunked(edges, batch_size):
+        yield [get_node_relationship(node_ids[from_node], node_ids[to_node],
+                                     edge_rel_name, properties)
+               for from_node, to_node, properties in chunk]
 
 
 def check_exception(result):
     """checks, if the preceding HTTP request was accepted by the Neo4j
-    server.
+    server. The exception which is raised otherwise has the HTTP status
+    code in its attribute `status_code`.
 
     :param result: a `Response \
 <http://docs.python-requests.org/en/latest/api/#requests.Response>`_
@@ -114,24 +524,860 @@ def check_exception(result):
     else:
         e = Exception("Unknown server error.")
         e.args += (result.content, )
+    e.status_code = result.status_code
     raise e
 
 
-def get_server_urls(server_url):
+def is_transient(e):
+    """checks, if a request failed for a reason which may go away when it
+    is sent again: a server error, a timeout or a lost connection.
+
+    :param e: the exception raised by :func:`post`
+    :rtype: a boolean
+    """
+    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return getattr(e, 'status_code', 0) >= 500
+
+
+def is_unsent(e):
+    """checks, if a request failed before its body was sent, i.e. the
+    connection to the server could not be established. Otherwise the
+    server may have committed the request before the answer was lost.
+
+    :param e: a `requests.ConnectionError` or `requests.Timeout`
+    :rtype: a boolean
+    """
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = e.args[0] if e.args else None
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+
+def post(url, data, session=None, retries=0, backoff=BACKOFF,
+         compression=None, timeout=None, idempotent=False):
+    """sends `data` to the Neo4j server with a POST request. A request
+    which failed with a server error, or whose connection could not be
+    established, is retried up to `retries` times, waiting `backoff`
+    seconds before the first retry and twice as long before every further
+    one. An iterator can only be sent once and is never retried.
+
+    A read timeout or a connection which is lost after the body was sent
+    is only retried if the request is `idempotent`, since the server may
+    already have committed it.
+
+    If `compression` is present, the body is compressed and sent with a
+    `Content-Encoding` header. Compressed answers are always accepted and
+    decompressed by `requests`.
+
+    If `timeout` is present, a request whose connection or answer takes
+    longer than `timeout` seconds fails with a `requests.Timeout`.
+
+    :param url: the URL of the REST endpoint
+    :param data: a JSON encoded string or an iterator of its fragments
+    :param optional session: a `requests.Session` to send the request with
+    :param optional retries: the maximum number of retries
+    :param optional backoff: the number of seconds before the first retry
+    :param optional compression: `'gzip'` or `'deflate'`
+    :param optional timeout: the number of seconds to wait for the server
+    :param optional idempotent: whether sending `data` twice has the same
+        effect as sending it once
+    :rtype: a `Response \
+<http://docs.python-requests.org/en/latest/api/#requests.Response>`_
+        instance.
+    """
+    http = session or requests
+    headers = HEADERS
+    if compression is not None:
+        data = compress_data(data, compression)
+        headers = dict(HEADERS, **{'content-encoding': compression})
+    if not isinstance(data, (type(b''), type(u''))):
+        retries = 0
+
+    for attempt in itertools.count():
+        try:
+            result = http.post(url, data=data, headers=headers,
+                               timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries or not (idempotent or is_unsent(e)):
+                raise
+        else:
+            if result.status_code < 500 or attempt >= retries:
+                check_exception(result)
+                return result
+        time.sleep(backoff * 2 ** attempt)
+
+
+def get_server_urls(server_url, session=None, timeout=None):
     """connects to the server with a GET request and returns its answer
     (e.g. a number of URLs of REST endpoints, the server version etc.)
     as a dictionary.
 
     :param server_url: the URL of the Neo4j server
+    :param optional session: a `requests.Session` to send the request with
+    :param optional timeout: the number of seconds to wait for the server
     :rtype: a dictionary of parameters of the Neo4j server
     """
-    result = requests.get(server_url)
+    http = session or requests
+    result = http.get(server_url, timeout=timeout)
     check_exception(result)
     return result.json()
 
 
+LABEL_QRY = """MATCH (a:{0})-[r]->(b:{1}) RETURN ID(a), r, ID(b);"""
+
+
+class NeoClient(object):
+    """A connection to a Neo4j server, which can be reused for many calls.
+    The HTTP connections are kept alive in a `requests.Session` and the
+    REST endpoints of the server are only looked up again after `ttl`
+    seconds::
+
+        from neonx import NeoClient
+
+        with NeoClient("http://localhost:7474/db/data/") as client:
+            for graph in graphs:
+                client.write_to_neo(graph, 'LINKS_TO', 'Node')
+
+    :param server_url: Server URL for the Neo4j server.
+    :param optional session: A `requests.Session`. Defaults to a new one.
+    :param optional ttl: Number of seconds the server URLs are cached for.
+    :param optional pool_size: Number of connections kept alive by a new
+        session.
+    :param optional retries: Number of times a request which failed with a
+        server error or a connection which could not be established is
+        sent again, see :func:`post`. The waiting time doubles with every
+        retry.
+    :param optional backoff: Number of seconds before the first retry.
+    :param optional metrics: A callable which is called with the name of a
+        phase, its duration in seconds and its counts as keyword
+        arguments after every phase of a call, e.g. a
+        :class:`neonx.MetricsRecorder`. It must be thread-safe if
+        `workers` are used. The phases are
+
+        * `'discovery'`: looking up the REST endpoints of the server,
+        * `'encode'`: JSON encoding a request body (`request_bytes`),
+        * `'request'`: an HTTP round trip including its retries
+          (`request_bytes`, `response_bytes`),
+        * `'decode'`: JSON decoding an answer (`results`),
+        * `'write_to_neo'` and `'get_neo_graph'`: a whole call (`nodes`,
+          `edges`).
+
+        Streamed request bodies are counted in bytes, the other request
+        bodies in characters, which are bytes with the default ASCII-only
+        JSON encoder. Request sizes are counted before compression and
+        response sizes after decompression, so they are not the sizes on
+        the wire.
+    :param optional compression: `'gzip'` or `'deflate'` to compress the
+        request bodies. Compressed answers are always accepted.
+    :param optional timeout: Number of seconds to wait for the server to
+        accept a connection or to answer, before the request fails with a
+        `requests.Timeout`. Defaults to waiting forever.
+    """
+
+    def __init__(self, server_url, session=None, ttl=DISCOVERY_TTL,
+                 pool_size=POOL_SIZE, retries=0, backoff=BACKOFF,
+                 metrics=None, compression=None, timeout=None):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError("Unknown compression: {0}".format(compression))
+
+        self.server_url = server_url
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = metrics
+        self.compression = compression
+        self.timeout = timeout
+        self.ttl = ttl
+        self.server_urls = None
+        self.discovered_at = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """closes all the connections of the session."""
+        self.session.close()
+
+    def get_server_urls(self):
+        """returns the (cached) answer of :func:`get_server_urls`.
+
+        :rtype: a dictionary of parameters of the Neo4j server
+        """
+        now = time.time()
+        if self.server_urls is None or now - self.discovered_at > self.ttl:
+            self.server_urls = get_server_urls(self.server_url, self.session,
+                                               self.timeout)
+            self.discovered_at = now
+            self.record('discovery', now)
+        return self.server_urls
+
+    def record(self, phase, start, **counts):
+        """reports a phase which began at `start` to `metrics`.
+
+        :param phase: the name of the phase
+        :param start: the `time.time()` at the beginning of the phase
+        :param counts: the numbers of entities or bytes of the phase
+        """
+        if self.metrics is not None:
+            self.metrics(phase, time.time() - start, **counts)
+
+    def encode(self, encoder, data):
+        """encodes a request body and reports it to `metrics`.
+
+        :param encoder: a JSONEncoder object
+        :param data: the batch operations or statements
+        :rtype: a JSON encoded string
+        """
+        start = time.time()
+        encoded = encoder.encode(data)
+        self.record('encode', start, request_bytes=len(encoded))
+        return encoded
+
+    def post(self, url, data, idempotent=False):
+        """sends `data` with :func:`post` and decodes the answer,
+        reporting the request to `metrics`.
+
+        :param url: the URL of the REST endpoint
+        :param data: a JSON encoded string or an iterator of its fragments
+        :param optional idempotent: whether the request may be retried
+            after a read timeout or a lost connection
+        :rtype: the decoded JSON answer
+        """
+        if self.metrics is None:
+            return post(url, data, self.session, self.retries,
+                        self.backoff, self.compression, self.timeout,
+                        idempotent).json()
+
+        streamed = not isinstance(data, (type(b''), type(u'')))
+        if streamed:
+            data = Meter(data)
+
+        start = time.time()
+        result = post(url, data, self.session, self.retries, self.backoff,
+                      self.compression, self.timeout, idempotent)
+        if streamed:
+            self.metrics('encode', data.seconds, request_bytes=data.size)
+        self.record('request', start,
+                    request_bytes=data.size if streamed else len(data),
+                    response_bytes=len(result.content))
+
+        start = time.time()
+        result_json = result.json()
+        self.record('decode', start, results=len(result_json))
+        return result_json
+
+    def post_batch(self, data):
+        """sends the encoded batch operations `data` to the batch endpoint.
+
+        :param data: a JSON encoded string of batch operations or an
+            iterator of its fragments
+        :rtype: A list of Neo4j created resources.
+        """
+        batch_url = self.get_server_urls()['batch']
+        return self.post(batch_url, data)
+
+    def post_statements(self, data, idempotent=False):
+        """sends the encoded Cypher statements `data` to the transactional
+        endpoint.
+
+        :param data: a JSON encoded string of statements
+        :param optional idempotent: whether the statements may be retried
+            after a read timeout or a lost connection, e.g. `MERGE`
+        :rtype: A list of results, one for every statement.
+        """
+        transaction_url = self.get_server_urls()['transaction']
+        result_json = self.post(transaction_url + '/commit', data,
+                                idempotent)
+        check_errors(result_json)
+        return result_json['results']
+
+    def write_to_neo(self, graph, edge_rel_name, label=None, encoder=None,
+                     batch_size=None, workers=None, backend='batch',
+                     undirected='both', key=None, checkpoint=None,
+                     output='resources', store=None, processes=None,
+                     node_index='dict'):
+        """See :func:`write_to_neo`."""
+
+        start = time.time()
+        results = self.write_graph(graph, edge_rel_name, label, encoder,
+                                   batch_size, workers, backend, undirected,
+                                   key, checkpoint, output, store, processes,
+                                   node_index)
+        self.record('write_to_neo', start, nodes=graph.number_of_nodes(),
+                    edges=graph.number_of_edges())
+        return results
+
+    def write_graph(self, graph, edge_rel_name, label=None, encoder=None,
+                    batch_size=None, workers=None, backend='batch',
+                    undirected='both', key=None, checkpoint=None,
+                    output='resources', store=None, processes=None,
+                    node_index='dict'):
+        """uploads `graph` with the chosen backend. See
+        :func:`write_to_neo`."""
+
+        if undirected not in UNDIRECTED_MODES:
+            raise ValueError("Unknown undirected mode: {0}".format(undirected))
+        return self.write_stream(graph.nodes(data=True),
+                                 iter_edges(graph, undirected), edge_rel_name,
+                                 label, encoder, batch_size, workers, backend,
+                                 key, checkpoint, output, store, processes,
+                                 node_index)
+
+    def write_stream(self, nodes, edges, edge_rel_name, label=None,
+                     encoder=None, batch_size=None, workers=None,
+                     backend='batch', key=None, checkpoint=None,
+                     output='resources', store=None, processes=None,
+                     node_index='dict'):
+        """See :func:`write_stream_to_neo`."""
+
+        if output not in WRITE_OUTPUTS:
+            raise ValueError("Unknown output: {0}".format(output))
+        if ((output != 'resources' or store is not None) and
+                (key is not None or backend != 'batch')):
+            raise ValueError("Node IDs are only returned by the batch "
+                             "backend.")
+
+        if store is not None and not isinstance(store, NodeIdStore):
+            store = NodeIdStore(store)
+            try:
+                return self.write_stream(nodes, edges, edge_rel_name, label,
+                                         encoder, batch_size, workers,
+                                         backend, key, checkpoint, output,
+                                         store, processes, node_index)
+            finally:
+                store.close()
+
+        if encoder is None:
+            encoder = json.JSONEncoder()
+
+        if (workers or checkpoint) and not batch_size:
+            batch_size = DEFAULT_BATCH_SIZE
+
+        if node_index not in NODE_INDEXES:
+            raise ValueError("Unknown node index: {0}".format(node_index))
+        if (processes or node_index != 'dict') and (
+                batch_size or key is not None or backend != 'batch'):
+            raise ValueError("Worker processes and a compact node index are "
+                             "only used for a single batch request.")
+
+        if batch_size == 'auto':
+            batch_size = AdaptiveBatchSize()
+        if isinstance(batch_size, AdaptiveBatchSize):
+            if key is not None or backend != 'batch' or checkpoint:
+                raise ValueError("An adaptive batch size needs the batch "
+                                 "backend without a checkpoint.")
+            return self.write_adaptive(nodes, edges, edge_rel_name, label,
+                                       encoder, batch_size, workers, output,
+                                       store)
+
+        if checkpoint is not None and (key is not None or
+                                       backend != 'batch'):
+            raise ValueError("A checkpoint needs the batch backend.")
+
+        if key is not None:
+            return self.merge_statements(nodes, edges, edge_rel_name, label,
+                                         key, encoder, batch_size, workers)
+
+        if backend == 'cypher':
+            return self.write_statements(nodes, edges, edge_rel_name, label,
+                                         encoder, batch_size, workers)
+        elif backend != 'batch':
+            raise ValueError("Unknown backend: {0}".format(backend))
+
+        if not batch_size:
+            return self.write_request(nodes, edges, edge_rel_name, label,
+                                      encoder, output, store, processes,
+                                      node_index)
+
+        if checkpoint is None:
+            return self.write_chunks(nodes, edges, edge_rel_name, label,
+                                     encoder, batch_size, workers,
+                                     output=output, store=store)
+
+        checkpoint = Checkpoint(checkpoint)
+        try:
+            results = self.write_chunks(nodes, edges, edge_rel_name, label,
+                                        encoder, batch_size, workers,
+                                        checkpoint, output, store)
+        except BaseException:
+            checkpoint.close()
+            raise
+        checkpoint.remove()
+        return results
+
+    def write_request(self, nodes, edges, edge_rel_name, label, encoder,
+                      output='resources', store=None, processes=None,
+                      node_index='dict'):
+        """uploads a graph with a single batch request with a streamed
+        body, which is encoded by `processes` worker processes, if present.
+        The batch indices of the nodes are looked up in a `node_index`.
+        The Neo4j IDs of the nodes are added to `store`, if present. See
+        :func:`write_to_neo`.
+
+        :rtype: See :func:`get_results`.
+        """
+
+        names = []
+        stream = nodes
+
+        def named_nodes():
+            for node_name, properties in stream:
+                names.append(node_name)
+                yield node_name, properties
+
+        if output != 'resources' or store is not None:
+            nodes = named_nodes()
+        if processes:
+            entities = iter_parallel_entities(nodes, edges, edge_rel_name,
+                                              label, encoder, processes,
+                                              node_index=node_index)
+        else:
+            entities = iter_stream_entities(nodes, edges, edge_rel_name,
+                                            label, encoder, node_index)
+        created = self.post_batch(iter_json_array(entities))
+        if output == 'resources' and store is None:
+            return created
+
+        node_ids = dict(zip(names, (get_node_id(item) for item in created)))
+        if store is not None:
+            store.update(node_ids)
+        if output == 'resources':
+            return created
+
+        start = len(names) * 2 if label else len(names)
+        return get_results(output, None, node_ids,
+                           itertools.islice(created, start, None))
+
+    def write_chunks(self, nodes, edges, edge_rel_name, label, encoder,
+                     batch_size, workers=None, checkpoint=None,
+                     output='resources', store=None, node_ids=None):
+        """uploads a graph with several batch requests. The chunks which
+        are already committed in `checkpoint` are skipped and every other
+        chunk is committed to it. The Neo4j IDs of the nodes are added to
+        `store`, if present. See :func:`write_to_neo`.
+
+        The edges may also refer to the nodes in `node_ids`, which already
+        exist, e.g. a :class:`neonx.NodeIdStore`.
+
+        :rtype: See :func:`get_results`.
+        """
+
+        results = []
+        if node_ids is None:
+            node_ids = {} if checkpoint is None else checkpoint.node_ids
+        node_chunks = generate_node_chunks(nodes, label, batch_size)
+        for i, (node_names, entities) in enumerate(node_chunks):
+            if checkpoint is not None and ('node', i) in checkpoint.done:
+                continue
+
+            created = self.post_batch(self.encode(encoder, entities))
+            ids = [(node_name, get_node_id(item))
+                   for node_name, item in zip(node_names, created)]
+            if checkpoint is None:
+                node_ids.update(ids)
+            else:
+                checkpoint.commit(('node', i), ids)
+            if store is not None:
+                store.update(ids)
+            if output == 'resources':
+                results.extend(created)
+
+        def post_chunk(chunk):
+            i, data = chunk
+            created = self.post_batch(data)
+            if checkpoint is not None:
+                checkpoint.commit(('relationship', i))
+            return created
+
+        chunks = generate_relationship_chunks(edges, edge_rel_name,
+                                              batch_size, node_ids)
+        payloads = ((i, self.encode(encoder, entities))
+                    for i, entities in enumerate(chunks)
+                    if checkpoint is None or
+                    ('relationship', i) not in checkpoint.done)
+        return get_results(output, results, node_ids,
+                           self.post_all(post_chunk, payloads, workers))
+
+    def write_adaptive(self, nodes, edges, edge_rel_name, label, encoder,
+                       batch_size, workers=None, output='resources',
+                       store=None, node_ids=None):
+        """uploads a graph with batch requests whose size is adapted by
+        the :class:`neonx.AdaptiveBatchSize` `batch_size`. See
+        :meth:`write_chunks` and :func:`write_to_neo`.
+
+        :rtype: See :func:`get_results`.
+        """
+
+        results = []
+        if node_ids is None:
+            node_ids = {}
+        per_node = 2 if label else 1
+
+        def encode_nodes(chunk):
+            entities = [get_node(i, properties)
+                        for i, (_, properties) in enumerate(chunk)]
+            if label:
+                entities.extend(get_label(i, label)
+                                for i in range(len(chunk)))
+            return self.encode(encoder, entities)
+
+        payloads = batch_size.iter_payloads(nodes, encode_nodes, per_node)
+        for chunk, data in payloads:
+            for part, created in self.post_adaptive(batch_size, chunk, data,
+                                                    encode_nodes, per_node):
+                ids = [(node_name, get_node_id(item))
+                       for (node_name, _), item in zip(part, created)]
+                node_ids.update(ids)
+                if store is not None:
+                    store.update(ids)
+                if output == 'resources':
+                    results.extend(created)
+
+        def encode_relationships(chunk):
+            return self.encode(encoder, [
+                get_node_relationship(node_ids[from_node],
+                                      node_ids[to_node], edge_rel_name,
+                                      properties)
+                for from_node, to_node, properties in chunk])
+
+        def post_chunk(payload):
+            chunk, data = payload
+            return [item for _, created
+                    in self.post_adaptive(batch_size, chunk, data,
+                                          encode_relationships)
+                    for item in created]
+
+        payloads = batch_size.iter_payloads(edges, encode_relationships)
+        return get_results(output, results, node_ids,
+                           self.post_all(post_chunk, payloads, workers))
+
+    def post_adaptive(self, batch_size, chunk, data, encode, per_item=1):
+        """sends the batch operations `data` of the items `chunk` and
+        reports the duration to `batch_size`. If the server answers with a
+        server error, the batch request was rolled back, so the chunk is
+        sent again in two halves, unless too many requests have failed in
+        a row. After a timeout or a lost connection the server may have
+        committed the chunk, so the size is decreased for the following
+        chunks, but the error is raised. Other errors, e.g. an invalid
+        property value, are raised at once.
+
+        :param batch_size: an :class:`neonx.AdaptiveBatchSize`
+        :param chunk: a list of nodes or edges
+        :param data: the encoded batch operations of `chunk`
+        :param encode: a function which encodes a list of items
+        :param optional per_item: the number of operations per item
+        :rtype: a list of `(items, created)` tuples, one for every request
+            which was answered
+        """
+        start = time.time()
+        try:
+            created = self.post_batch(data)
+        except Exception as e:
+            if not is_transient(e) or not batch_size.failed() or \
+                    getattr(e, 'status_code', 0) < 500 or len(chunk) < 2:
+                raise
+            half = len(chunk) // 2
+            return (self.post_adaptive(batch_size, chunk[:half],
+                                       encode(chunk[:half]), encode,
+                                       per_item) +
+                    self.post_adaptive(batch_size, chunk[half:],
+                                       encode(chunk[half:]), encode,
+                                       per_item))
+        batch_size.update(len(chunk) * per_item, time.time() - start,
+                          len(data))
+        return [(chunk, created)]
+
+    def add_edges(self, edges, edge_rel_name, store, encoder=None,
+                  batch_size=None, workers=None, output='resources'):
+        """See :func:`add_edges_to_neo`."""
+
+        if output not in ('resources', 'ids'):
+            raise ValueError("Unknown output: {0}".format(output))
+
+        if not isinstance(store, NodeIdStore):
+            store = NodeIdStore(store)
+            try:
+                return self.add_edges(edges, edge_rel_name, store, encoder,
+                                      batch_size, workers, output)
+            finally:
+                store.close()
+
+        if encoder is None:
+            encoder = json.JSONEncoder()
+        if not batch_size:
+            batch_size = DEFAULT_BATCH_SIZE
+        if batch_size == 'auto':
+            batch_size = AdaptiveBatchSize()
+
+        if isinstance(batch_size, AdaptiveBatchSize):
+            results = self.write_adaptive((), edges, edge_rel_name, None,
+                                          encoder, batch_size, workers,
+                                          output, node_ids=store)
+        else:
+            results = self.write_chunks((), edges, edge_rel_name, None,
+                                        encoder, batch_size, workers,
+                                        output=output, node_ids=store)
+        return results[1] if output == 'ids' else results
+
+    def write_statements(self, nodes, edges, edge_rel_name, label, encoder,
+                         batch_size=None, workers=None):
+        """uploads a graph with parameterised Cypher statements instead of
+        batch operations. See :func:`write_to_neo`.
+
+        :rtype: A list of results of the transactional endpoint.
+        """
+
+        results = []
+        node_ids = {}
+        for chunk in chunked(nodes, batch_size):
+            statement = get_node_statement([p for _, p in chunk], label)
+            result = self.post_statements(
+                self.encode(encoder, {"statements": [statement]}))[0]
+            for (node_name, _), row in zip(chunk, result['data']):
+                node_ids[node_name] = row['row'][0]
+            results.append(result)
+
+        def payloads():
+            for chunk in chunked(edges, batch_size):
+                rows = [[node_ids[from_node], node_ids[to_node], properties]
+                        for from_node, to_node, properties in chunk]
+                statement = get_relationship_statement(rows, edge_rel_name)
+                yield self.encode(encoder, {"statements": [statement]})
+
+        results.extend(self.post_all(self.post_statements, payloads(),
+                                     workers))
+        return results
+
+    def merge_statements(self, nodes, edges, edge_rel_name, label, key,
+                         encoder, batch_size=None, workers=None):
+        """creates or updates a graph with Cypher `MERGE` statements, which
+        find the nodes by the property `key`. See :func:`write_to_neo`.
+
+        :rtype: A list of results of the transactional endpoint.
+        """
+
+        if not label:
+            raise ValueError("A label is needed to merge nodes by key.")
+
+        def post_merge(data):
+            return self.post_statements(data, idempotent=True)
+
+        statement = get_constraint_statement(label, key)
+        results = post_merge(self.encode(encoder,
+                                         {"statements": [statement]}))
+
+        def node_payloads():
+            for chunk in chunked(nodes, batch_size):
+                rows = [[node_name, properties]
+                        for node_name, properties in chunk]
+                statement = get_merge_node_statement(rows, label, key)
+                yield self.encode(encoder, {"statements": [statement]})
+
+        results.extend(self.post_all(post_merge, node_payloads(), workers))
+
+        def relationship_payloads():
+            for chunk in chunked(edges, batch_size):
+                rows = [list(edge) for edge in chunk]
+                statement = get_merge_relationship_statement(
+                    rows, label, key, edge_rel_name)
+                yield self.encode(encoder, {"statements": [statement]})
+
+        results.extend(self.post_all(post_merge, relationship_payloads(),
+                                     workers))
+        return results
+
+    def post_all(self, post, payloads, workers=None):
+        """sends every payload with `post`. If `workers` is larger than one,
+        that many requests are sent concurrently, and at most two payloads
+        per worker are encoded ahead of the requests. If a request fails,
+        no further ones are started, but those in flight are waited for, so
+        that they are committed e.g. to a checkpoint before the error is
+        raised.
+
+        :param post: a method like :meth:`post_batch`
+        :param payloads: an iterable of request bodies
+        :param optional workers: the number of concurrent requests
+        :rtype: an iterator of the items of all the answers, in the order
+            of the payloads
+        """
+        if not workers or workers < 2:
+            for data in payloads:
+                for item in post(data):
+                    yield item
+            return
+
+        stopped = threading.Event()
+
+        def send(data):
+            if not stopped.is_set():
+                return post(data)
+
+        pool = ThreadPool(workers)
+        pending = collections.deque()
+        try:
+            for data in payloads:
+                pending.append(pool.apply_async(send, (data, )))
+                if len(pending) >= 2 * workers:
+                    for item in pending.popleft().get():
+                        yield item
+
+            while pending:
+                for item in pending.popleft().get():
+                    yield item
+        except BaseException:
+            stopped.set()
+            raise
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_neo_graph(self, label, create_using=None, page_size=None,
+                      output='graph', node_properties=None,
+                      relationship_properties=None, rel_types=None,
+                      where=None, params=None):
+        """See :func:`get_neo_graph`."""
+
+        start = time.time()
+        result = self.read_graph(label, create_using, page_size, output,
+                                 node_properties, relationship_properties,
+                                 rel_types, where, params)
+        if output == 'graph':
+            nodes, edges = result.number_of_nodes(), result.number_of_edges()
+        elif output == 'arrays':
+            nodes, edges = len(result['node_ids']), len(result['edges'])
+        else:
+            nodes, edges = len(result[1]), int(result[0].sum())
+        self.record('get_neo_graph', start, nodes=nodes, edges=edges)
+        return result
+
+    def read_graph(self, label, create_using=None, page_size=None,
+                   output='graph', node_properties=None,
+                   relationship_properties=None, rel_types=None, where=None,
+                   params=None):
+        """reads a graph with the chosen method. See
+        :func:`get_neo_graph`."""
+
+        queries = (get_node_page_query(node_properties, where),
+                   get_relationship_page_query(relationship_properties,
+                                               rel_types, where))
+        filtered = (node_properties, relationship_properties, rel_types,
+                    where) != (None, None, None, None)
+
+        if output != 'graph':
+            return self.read_columns(label, page_size or PAGE_SIZE, output,
+                                     queries, params)
+
+        if page_size or filtered:
+            return self.read_pages(label, create_using,
+                                   page_size or PAGE_SIZE, queries, params)
+
+        data = [{"method": "GET", "to": '/label/{0}/nodes'.format(label),
+                 "body": {}},
+                {"method": "POST", "to": '/cypher', "body": {"query":
+                 LABEL_QRY.format(label, label), "params": {}}},
+                ]
+
+        node_data, edge_date = self.post_batch(json.dumps(data))
+        graph = nx.DiGraph() if create_using is None else create_using
+
+        for n in node_data['body']:
+            node_id = int(n['self'].rpartition('/')[-1])
+            graph.add_node(node_id, **n['data'])
+
+        for n in edge_date['body']['data']:
+            from_node_id, relationship, to_node_id = n
+
+            properties = relationship['data']
+            properties['neo_rel_name'] = relationship['type']
+            graph.add_edge(from_node_id, to_node_id, **properties)
+
+        return graph
+
+    def read_pages(self, label, create_using=None, page_size=None,
+                   queries=None, params=None):
+        """reads a graph page by page. See :func:`get_neo_graph`.
+
+        :param optional queries: the node query and the relationship query,
+            defaults to `NODE_PAGE_QRY` and `RELATIONSHIP_PAGE_QRY`
+        :param optional params: the parameters of the queries
+        """
+
+        graph = nx.DiGraph() if create_using is None else create_using
+        node_query, relationship_query = queries or (
+            get_node_page_query(), get_relationship_page_query())
+
+        rows = self.iter_pages(node_query, label, page_size, params)
+        for node_id, properties in rows:
+            graph.add_node(node_id, **get_present(properties))
+
+        rows = self.iter_pages(relationship_query, label, page_size, params)
+        for _, from_node_id, rel_name, properties, to_node_id in rows:
+            properties = get_present(properties)
+            properties['neo_rel_name'] = rel_name
+            graph.add_edge(from_node_id, to_node_id, **properties)
+
+        return graph
+
+    def read_columns(self, label, page_size, output, queries=None,
+                     params=None):
+        """reads a graph page by page into NumPy arrays or a sparse matrix.
+        See :func:`get_neo_graph`."""
+
+        if output == 'arrays':
+            build = get_arrays
+        elif output == 'sparse':
+            build = get_sparse
+        else:
+            raise ValueError("Unknown output: {0}".format(output))
+
+        node_query, relationship_query = queries or (
+            get_node_page_query(), get_relationship_page_query())
+        return build(self.iter_pages(node_query, label, page_size, params),
+                     self.iter_pages(relationship_query, label, page_size,
+                                     params))
+
+    def iter_pages(self, query, label, page_size, params=None):
+        """iterates over the rows of a paged Cypher query. Only a single
+        page is held in memory at any time.
+
+        :param query: `NODE_PAGE_QRY` or `RELATIONSHIP_PAGE_QRY`, or a
+            filtered variant of them
+        :param label: the label of the nodes
+        :param page_size: the number of rows per request
+        :param optional params: further parameters of the query
+        :rtype: an iterator of rows
+        """
+        last = -1
+        while True:
+            statement = get_page_statement(query, label, last, page_size,
+                                           params)
+            result = self.post_statements(
+                json.dumps({"statements": [statement]}))[0]
+            rows = [item['row'] for item in result['data']]
+            del result
+
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+
 def write_to_neo(server_url, graph, edge_rel_name, label=None,
-                 encoder=None):
+                 encoder=None, batch_size=None, workers=None, backend='batch',
+                 undirected='both', key=None, retries=0, checkpoint=None,
+                 metrics=None, compression=None, output='resources',
+                 store=None, timeout=None, processes=None,
+                 node_index='dict'):
     """Write the `graph` as Geoff string. The edges between the nodes
     have relationship name `edge_rel_name`. The code
     below shows a simple example::
@@ -158,65 +1404,326 @@ def write_to_neo(server_url, graph, edge_rel_name, label=None,
     created. Label support were added in Neo4j 2.0. See \
     `here <http://bit.ly/1fo5324>`_.
 
+    The request body is encoded while it is being sent, so the graph is
+    never held in memory as a single string.
+
+    If `batch_size` is present, the graph is uploaded with several HTTP
+    requests of at most `batch_size` operations each instead of a single
+    one. The nodes are created first and the relationships refer to them
+    by their Neo4j IDs. Note that the chunks are separate transactions.
+    A node and its label are always sent in the same request, so with a
+    `label` every request has at least 2 operations, even if `batch_size`
+    is 1.
+
+    If `workers` is present, the relationships are uploaded with that many
+    concurrent requests once all the nodes have been created. The chunks
+    contain `batch_size` or, by default, 10000 operations.
+
+    If `batch_size` is `'auto'` or an :class:`neonx.AdaptiveBatchSize`, the
+    number of operations per request grows while the server answers
+    quickly and shrinks when it slows down or a request fails. A chunk
+    which fails with a server error is sent again in two halves, a chunk
+    whose answer times out or is lost is not, since the server may have
+    committed it. No request body is larger than the
+    byte limit of the :class:`neonx.AdaptiveBatchSize`. This uses the batch
+    backend and cannot be combined with a `checkpoint`.
+
+    If `backend` is `'cypher'`, the graph is created with parameterised
+    `UNWIND` statements sent to the transactional endpoint instead of one
+    batch operation per node, label and relationship. This needs Neo4j 2.1
+    or later. The nodes and the relationships are always sent in separate
+    requests.
+
+    Every edge of an undirected graph is stored as two relationships, one
+    in each direction. If `undirected` is `'single'`, only one relationship
+    is created per edge instead, since Cypher can traverse relationships in
+    either direction. Pass `create_using=nx.Graph()` to
+    :func:`get_neo_graph` to read such a graph back.
+
+    If `key` is present, the nodes are stored with their NetworkX name in
+    the property `key` and are merged with existing nodes with the same
+    `label` and `key`, and the relationships are merged with existing ones
+    between the same nodes. Uploading a graph again thus updates it instead
+    of creating duplicates. A unique constraint on `key` is created first,
+    so that the nodes are found with its index. This always uses Cypher
+    statements and needs a `label`.
+
+    If `timeout` is present, a request fails with a `requests.Timeout` if
+    the server does not accept the connection or answer within `timeout`
+    seconds. By default a stalled server is waited for forever.
+
+    If `retries` is present, a chunk which fails with a server error or
+    whose connection cannot be established is sent again up to `retries`
+    times, with an exponentially growing pause in between. After a read
+    timeout or a connection lost while waiting for the answer, the server
+    may already have committed the chunk, so it is only sent again with
+    `key`, whose `MERGE` statements can safely be repeated. A streamed
+    request body (without `batch_size`) is never sent again.
+
+    If `checkpoint` is present, every chunk committed by the server is
+    logged to the file `checkpoint`, together with the Neo4j IDs of the
+    nodes it created. If the upload is interrupted, calling `write_to_neo`
+    again with the same graph, arguments and `checkpoint` only sends the
+    chunks which are missing, and returns only their results. The file is
+    deleted when the upload is complete. This uses the batch backend.
+
+    If `metrics` is present, it is called with the duration and the sizes
+    of every phase of the upload (discovery, encoding, HTTP requests and
+    decoding of the answers). See :class:`NeoClient`.
+
+    If `compression` is `'gzip'` or `'deflate'`, the request bodies are
+    compressed, a streamed body while it is being sent. The batch
+    operations are very repetitive and shrink to a fraction of their size.
+    The server, or a proxy in front of it, has to accept compressed
+    requests.
+
+    By default the answer of the server is returned, which echoes every
+    created node and relationship with its URLs and properties. If `output`
+    is `'node_ids'`, only a dictionary which maps the NetworkX nodes to
+    their Neo4j IDs is returned. If it is `'ids'`, an array of the Neo4j IDs
+    of the relationships follows in a tuple, in the order of
+    `graph.edges()`, with the reverse relationship after every undirected
+    edge. With `batch_size`, the answer to every chunk is dropped as soon
+    as the IDs are taken from it, so only the IDs are held in memory; the
+    answer to a single request is decoded completely first. This uses the
+    batch backend.
+
+    If `store` is present, the Neo4j IDs of the nodes are added to this
+    :class:`neonx.NodeIdStore`, or to the one in the file `store`, as soon
+    as they are created, so that :func:`add_edges_to_neo` can add edges
+    between them later. This uses the batch backend.
+
+    If `processes` is present, the batch operations are JSON encoded by that
+    many worker processes while the request is being sent, as with
+    :func:`neonx.get_geoff`. This pays off for graphs with millions of
+    edges. The encoder must be picklable. This is only used for a single
+    batch request, without `batch_size`.
+
+    If `node_index` is `'compact'`, the batch indices of the nodes are
+    looked up in a :class:`neonx.index.NodeIndex` instead of a dictionary
+    while the request is encoded, which needs a fraction of the memory for
+    graphs with millions of nodes, at the cost of slower lookups. This is
+    only used for a single batch request, without `batch_size`.
+
     :param server_url: Server URL for the Neo4j server.
     :param graph: A NetworkX Graph or a DiGraph.
     :param edge_rel_name: Relationship name between the nodes.
     :param optional label: It will add this label to the node. \
 See `here <http://bit.ly/1fo5324>`_.
     :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
-    :rtype: A list of Neo4j created resources.
+    :param optional batch_size: Maximum number of operations per request,
+        `'auto'` or an :class:`neonx.AdaptiveBatchSize`.
+    :param optional workers: Number of concurrent requests for the
+        relationships.
+    :param optional backend: Either `'batch'` (the default) or `'cypher'`.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`.
+    :param optional key: Property which identifies the nodes to merge.
+    :param optional retries: Number of retries of a failed request.
+    :param optional checkpoint: Path of a file to log the progress to.
+    :param optional metrics: A callable which receives the measurements,
+        e.g. a :class:`neonx.MetricsRecorder`.
+    :param optional compression: `'gzip'` or `'deflate'`.
+    :param optional output: Either `'resources'` (the default),
+        `'node_ids'` or `'ids'`.
+    :param optional store: A :class:`neonx.NodeIdStore` or the path of its
+        file.
+    :param optional timeout: Number of seconds to wait for the server.
+    :param optional processes: Number of worker processes.
+    :param optional node_index: Either `'dict'` (the default) or
+        `'compact'`.
+    :rtype: A list of Neo4j created resources, or of the results of the
+        Cypher statements, a dictionary of node IDs, or a tuple of a
+        dictionary of node IDs and an array of relationship IDs.
     """
 
-    if encoder is None:
-        encoder = json.JSONEncoder()
+    pool_size = max(workers or 0, POOL_SIZE)
+    with NeoClient(server_url, pool_size=pool_size, retries=retries,
+                   metrics=metrics, compression=compression,
+                   timeout=timeout) as client:
+        return client.write_to_neo(graph, edge_rel_name, label, encoder,
+                                   batch_size=batch_size, workers=workers,
+                                   backend=backend, undirected=undirected,
+                                   key=key, checkpoint=checkpoint,
+                                   output=output, store=store,
+                                   processes=processes,
+                                   node_index=node_index)
 
-    all_server_urls = get_server_urls(server_url)
-    batch_url = all_server_urls['batch']
 
-    data = generate_data(graph, edge_rel_name, label, encoder)
-    result = requests.post(batch_url, data=data, headers=HEADERS)
-    check_exception(result)
-    return result.json()
+def write_stream_to_neo(server_url, nodes, edges, edge_rel_name, label=None,
+                        encoder=None, batch_size=None, workers=None,
+                        backend='batch', key=None, retries=0,
+                        checkpoint=None, metrics=None, compression=None,
+                        output='resources', store=None, timeout=None,
+                        processes=None, node_index='dict'):
+    """Write a graph which is given as a stream of nodes and a stream of
+    edges instead of a NetworkX graph, e.g. read from an edge list file or
+    a database cursor::
 
+        from neonx import write_stream_to_neo
 
-LABEL_QRY = """MATCH (a:{0})-[r]->(b:{1}) RETURN ID(a), r, ID(b);"""
+        nodes = ((row[0], {'name': row[1]}) for row in cursor)
+        edges = ((a, b, {}) for a, b in edge_list)
+        results = write_stream_to_neo("http://localhost:7474/db/data/", \
+nodes, edges, 'LINKS_TO', 'Node', batch_size=10000)
 
+    All the nodes are sent before the first edge is read, and every edge
+    becomes a single relationship from the first to the second node. Only
+    a mapping of the node names to their IDs is held in memory, never the
+    properties. Every edge must refer to a node of `nodes`, otherwise a
+    `KeyError` is raised. A duplicate node name creates another node, and
+    the edges refer to the last node with that name.
 
-def get_neo_graph(server_url, label):
-    """Return a graph of all nodes with a given Neo4j label and edges between
-    the same nodes.
+    The options are the same as for :func:`write_to_neo`. A `checkpoint`
+    can only be resumed with the same nodes and edges in the same order.
+    With `output='ids'` the relationship IDs are in the order of `edges`.
 
     :param server_url: Server URL for the Neo4j server.
-    :param label: The label to retrieve the nodes for.
-    :rtype: A `Digraph \
-<http://networkx.github.io/documentation/latest/\
-reference/classes.digraph.html>`_.
+    :param nodes: An iterable of `(node_name, properties)` tuples, like
+        `graph.nodes(data=True)`.
+    :param edges: An iterable of `(from_node, to_node, properties)` tuples,
+        like `graph.edges(data=True)`.
+    :param edge_rel_name: Relationship name between the nodes.
+    :rtype: A list of Neo4j created resources, or of the results of the
+        Cypher statements.
     """
 
-    all_server_urls = get_server_urls(server_url)
-    batch_url = all_server_urls['batch']
+    pool_size = max(workers or 0, POOL_SIZE)
+    with NeoClient(server_url, pool_size=pool_size, retries=retries,
+                   metrics=metrics, compression=compression,
+                   timeout=timeout) as client:
+        return client.write_stream(nodes, edges, edge_rel_name, label,
+                                   encoder, batch_size=batch_size,
+                                   workers=workers, backend=backend, key=key,
+                                   checkpoint=checkpoint, output=output,
+                                   store=store, processes=processes,
+                                   node_index=node_index)
 
-    data = [{"method": "GET", "to": '/label/{0}/nodes'.format(label),
-             "body": {}},
-            {"method": "POST", "to": '/cypher', "body": {"query":
-             LABEL_QRY.format(label, label), "params": {}}},
-            ]
 
-    result = requests.post(batch_url, data=json.dumps(data), headers=HEADERS)
-    check_exception(result)
+def add_edges_to_neo(server_url, edges, edge_rel_name, store, encoder=None,
+                     batch_size=None, workers=None, retries=0, metrics=None,
+                     compression=None, output='resources', timeout=None):
+    """Add relationships between nodes which already exist in Neo4j, e.g.
+    new edges of a graph which was uploaded before. The Neo4j IDs of the
+    nodes are looked up in `store`, which was filled by
+    `write_to_neo(store=...)`, so the nodes are neither sent again nor
+    looked up on the server::
+
+        from neonx import add_edges_to_neo
+
+        add_edges_to_neo("http://localhost:7474/db/data/", \
+G.edges(data=True), 'LINKS_TO', 'graph.ids')
 
-    node_data, edge_date = result.json()
-    graph = nx.DiGraph()
+    Every edge becomes a single relationship from the first to the second
+    node. A `KeyError` is raised for a node which is not in `store`, and
+    the relationships of the earlier chunks are kept.
 
-    for n in node_data['body']:
-        node_id = int(n['self'].rpartition('/')[-1])
-        graph.add_node(node_id, **n['data'])
+    The relationships are sent with batch requests of `batch_size`, by
+    default 10000, operations, or an adaptive size as with
+    :func:`write_to_neo`.
 
-    for n in edge_date['body']['data']:
-        from_node_id, relationship, to_node_id = n
+    :param server_url: Server URL for the Neo4j server.
+    :param edges: An iterable of `(from_node, to_node, properties)` tuples,
+        like `graph.edges(data=True)`.
+    :param edge_rel_name: Relationship name between the nodes.
+    :param store: A :class:`neonx.NodeIdStore` or the path of its file.
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional batch_size: Maximum number of operations per request,
+        `'auto'` or an :class:`neonx.AdaptiveBatchSize`.
+    :param optional workers: Number of concurrent requests.
+    :param optional retries: Number of retries of a failed request.
+    :param optional metrics: A callable which receives the measurements,
+        e.g. a :class:`neonx.MetricsRecorder`.
+    :param optional compression: `'gzip'` or `'deflate'`.
+    :param optional output: `'ids'` to return only an array of the Neo4j
+        IDs of the relationships, in the order of `edges`.
+    :param optional timeout: Number of seconds to wait for the server.
+    :rtype: A list of Neo4j created resources, or an array of relationship
+        IDs.
+    """
 
-        properties = relationship['data']
-        properties['neo_rel_name'] = relationship['type']
-        graph.add_edge(from_node_id, to_node_id, **properties)
+    pool_size = max(workers or 0, POOL_SIZE)
+    with NeoClient(server_url, pool_size=pool_size, retries=retries,
+                   metrics=metrics, compression=compression,
+                   timeout=timeout) as client:
+        return client.add_edges(edges, edge_rel_name, store, encoder,
+                                batch_size=batch_size, workers=workers,
+                                output=output)
+
+
+def get_neo_graph(server_url, label, create_using=None, page_size=None,
+                  output='graph', metrics=None, compression=None,
+                  node_properties=None, relationship_properties=None,
+                  rel_types=None, where=None, params=None, timeout=None):
+    """Return a graph of all nodes with a given Neo4j label and edges between
+    the same nodes.
+
+    If `create_using` is an undirected graph (e.g. `nx.Graph()`), every
+    relationship becomes an undirected edge. This reads back graphs written
+    with `undirected='single'`.
+
+    If `page_size` is present, the nodes and the relationships are read
+    with Cypher queries of at most `page_size` rows each and added to the
+    graph page by page, so that the whole answer of the server is never
+    held in memory. This needs Neo4j 2.0 or later.
+
+    If `output` is `'arrays'` or `'sparse'`, no NetworkX graph is built.
+    The pages are read into NumPy arrays of node IDs, edges and property
+    columns (see :func:`neonx.columnar.get_arrays`) or into a
+    `scipy.sparse` adjacency matrix and an array of the node IDs of its
+    rows (see :func:`neonx.columnar.get_sparse`). This needs numpy, and
+    scipy for the latter.
+
+    The other arguments are pushed down into the Cypher queries, so that
+    only the requested data is sent by the server. Only the properties
+    named in `node_properties` and `relationship_properties` are returned,
+    and missing ones are left out. Only the relationships whose types are
+    in `rel_types` are returned. `where` is a Cypher condition on a node
+    `n`, with parameters `{name}` whose values are given in `params`; only
+    the nodes which match it are returned, and only the relationships
+    between two of them::
+
+        graph = get_neo_graph("http://localhost:7474/db/data/", 'Person',
+                              node_properties=['name'],
+                              rel_types=['KNOWS'],
+                              where='n.age >= {min_age}',
+                              params={'min_age': 18})
+
+    These read the graph page by page, with `page_size` rows or 100000
+    rows per request. `params` must not contain `last` or `limit`.
+
+    If `metrics` is present, it is called with the duration and the sizes
+    of every phase of the download. See :class:`NeoClient`.
+
+    The answers of the server are decompressed if it sends them with gzip
+    or deflate compression, which is always accepted. If `compression` is
+    present, the queries are compressed too.
+
+    :param server_url: Server URL for the Neo4j server.
+    :param label: The label to retrieve the nodes for.
+    :param optional create_using: The NetworkX graph to add the nodes and
+        edges to. Defaults to a new DiGraph.
+    :param optional page_size: Maximum number of rows per request.
+    :param optional output: `'graph'` (the default), `'arrays'` or
+        `'sparse'`.
+    :param optional metrics: A callable which receives the measurements,
+        e.g. a :class:`neonx.MetricsRecorder`.
+    :param optional compression: `'gzip'` or `'deflate'`.
+    :param optional node_properties: List of node properties to return.
+    :param optional relationship_properties: List of relationship
+        properties to return.
+    :param optional rel_types: List of relationship types to return.
+    :param optional where: Cypher condition on the nodes `n`.
+    :param optional params: Dictionary of parameters of `where`.
+    :param optional timeout: Number of seconds to wait for the server, see
+        :func:`write_to_neo`.
+    :rtype: A `Digraph \
+<http://networkx.github.io/documentation/latest/\
+reference/classes.digraph.html>`_, or `create_using`.
+    """
 
-    return graph
+    with NeoClient(server_url, metrics=metrics, compression=compression,
+                   timeout=timeout) as client:
+        return client.get_neo_graph(label, create_using, page_size, output,
+                                    node_properties, relationship_properties,
+                                    rel_types, where, params)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import multiprocessing
+
+from .encoding import EncodingCache
+
+__all__ = ['start_pool', 'imap']
+
+
+CHUNK_SIZE = 10000
+
+# the encoder of a worker process, set up by `init_worker()`
+worker = {}
+
+
+def init_worker(encoder):
+    """sets up a worker process of :func:`start_pool`.
+
+    :param encoder: a JSONEncoder object
+    """
+    worker['encoder'] = EncodingCache(encoder)
+
+
+def get_worker_encoder():
+    """returns the encoder of the current worker process.
+
+    :rtype: an EncodingCache
+    """
+    return worker['encoder']
+
+
+def start_pool(processes, encoder):
+    """starts a pool of worker processes which encode with `encoder`. The
+    encoder is pickled, so a custom encoder class must be defined at the
+    top level of a module.
+
+    :param processes: the number of worker processes
+    :param encoder: a JSONEncoder object
+    :rtype: a `multiprocessing.Pool`
+    """
+    return multiprocessing.Pool(processes, init_worker, (encoder, ))
+
+
+def imap(pool, func, tasks, ahead):
+    """calls `func` for every task in the processes of `pool`. Unlike
+    `Pool.imap()`, at most `ahead` tasks are taken from `tasks` before
+    their results are consumed, so that a large graph is never copied
+    into the queue of the pool as a whole.
+
+    :param pool: a `multiprocessing.Pool`
+    :param func: a function defined at the top level of a module
+    :param tasks: an iterable of picklable arguments of `func`
+    :param ahead: the maximum number of pending tasks
+    :rtype: an iterator of the results, in the order of the tasks
+    """
+    pending = collections.deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task, )))
+        if len(pending) >= ahead:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import threading
+
+__all__ = ['NodeIdStore']
+
+
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS nodes \
+(name PRIMARY KEY, id INTEGER NOT NULL)"""
+SELECT_ID = "SELECT id FROM nodes WHERE name = ?"
+SELECT_ITEMS = "SELECT name, id FROM nodes"
+COUNT = "SELECT COUNT(*) FROM nodes"
+INSERT = "INSERT OR REPLACE INTO nodes (name, id) VALUES (?, ?)"
+
+# raised for a parameter of an unsupported type, by Python 3.11 and later
+# as a ProgrammingError, which is also raised e.g. for a closed database
+BINDING_ERRORS = (sqlite3.InterfaceError, sqlite3.ProgrammingError)
+
+
+def is_binding_error(e):
+    """checks, if a SQLite error was raised for a parameter of an
+    unsupported type, e.g. "Error binding parameter 0".
+
+    :param e: an exception
+    :rtype: a boolean
+    """
+    return isinstance(e, BINDING_ERRORS) and 'binding parameter' in str(e)
+
+
+class NodeIdStore(object):
+    """A persistent mapping of node names to the Neo4j IDs of the nodes,
+    stored in a SQLite database. It is filled by
+    `write_to_neo(store=...)` and lets :func:`neonx.add_edges_to_neo` add
+    relationships between nodes which already exist, without sending the
+    nodes again or looking them up on the server::
+
+        from neonx import NodeIdStore, write_to_neo, add_edges_to_neo
+
+        with NodeIdStore('graph.ids') as store:
+            write_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                         'Node', store=store)
+
+        # later
+        with NodeIdStore('graph.ids') as store:
+            add_edges_to_neo("http://localhost:7474/db/data/",
+                             [(1, 3, {})], 'LINKS_TO', store)
+
+    The names must be strings or numbers. `1` and `'1'` are different
+    names. The store can be used from several threads.
+
+    :param path: the path of the database file, or `':memory:'`. An
+        existing store is opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(CREATE_TABLE)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute(COUNT).fetchone()[0]
+
+    def __getitem__(self, name):
+        try:
+            with self.lock:
+                row = self.connection.execute(SELECT_ID,
+                                              (name, )).fetchone()
+        except BINDING_ERRORS as e:
+            if not is_binding_error(e):
+                raise
+            raise ValueError("Unsupported node name: {0!r}".format(name))
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def items(self):
+        """returns all the node names and their Neo4j IDs.
+
+        :rtype: a list of `(node_name, neo4j_id)` tuples
+        """
+        with self.lock:
+            return self.connection.execute(SELECT_ITEMS).fetchall()
+
+    def update(self, node_ids):
+        """stores the Neo4j IDs of nodes, replacing those of nodes with the
+        same names, and commits them. If any of them cannot be stored, none
+        of them are.
+
+        :param node_ids: a dictionary or an iterable of
+            `(node_name, neo4j_id)` tuples
+        """
+        if hasattr(node_ids, 'items'):
+            node_ids = node_ids.items()
+        with self.lock:
+            try:
+                self.connection.executemany(INSERT, node_ids)
+            except BaseException as e:
+                self.connection.rollback()
+                if is_binding_error(e):
+                    raise ValueError("Unsupported node name: {0}".format(e))
+                raise
+            self.connection.commit()
+
+    def close(self):
+        """closes the database."""
+        self.connection.close()
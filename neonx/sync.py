@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import itertools
+import json
+import pickle
+
+import networkx as nx
+
+from .neo import NeoClient, get_label, get_node, get_node_id
+from .utils import UNDIRECTED_MODES
+
+
+__all__ = ['Snapshot', 'sync_to_neo']
+
+
+class Snapshot(object):
+    """The state of a graph after its last upload with :func:`sync_to_neo`.
+    It remembers the Neo4j IDs and a fingerprint of the attributes of every
+    node and edge, keyed by the node name and the edge endpoints.
+
+    A snapshot can be saved to a file and loaded again for the next
+    upload::
+
+        snapshot = Snapshot.load('graph.snapshot')
+        sync_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                    snapshot, 'Node')
+        snapshot.save('graph.snapshot')
+    """
+
+    def __init__(self):
+        # node name -> (node ID, fingerprint)
+        self.nodes = {}
+        # (from node, to node) -> (relationship IDs, fingerprint)
+        self.edges = {}
+
+    @classmethod
+    def load(cls, path):
+        """loads a snapshot saved with :meth:`save`. A missing file gives
+        an empty snapshot.
+
+        :param path: the path of the file
+        :rtype: a Snapshot
+        """
+        snapshot = cls()
+        try:
+            f = open(path, 'rb')
+        except IOError:
+            return snapshot
+        with f:
+            snapshot.nodes, snapshot.edges = pickle.load(f)
+        return snapshot
+
+    def save(self, path):
+        """saves the snapshot to a file.
+
+        :param path: the path of the file
+        """
+        with open(path, 'wb') as f:
+            pickle.dump((self.nodes, self.edges), f, 2)
+
+
+def fingerprint(encoded):
+    """returns a short digest of JSON encoded attributes.
+
+    :param encoded: a JSON encoded string
+    :rtype: a byte string
+    """
+    return hashlib.md5(encoded.encode('utf-8')).digest()[:8]
+
+
+def generate_sync_data(graph, edge_rel_name, label, snapshot, encoder,
+                       undirected='both'):
+    """computes the Neo4j batch operations which change the graph stored
+    in Neo4j, as described by `snapshot`, into `graph`. Only new nodes and
+    edges are created, nodes and edges whose attributes have changed are
+    updated and the ones which are gone are deleted.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param edge_rel_name: string that describes the relationship between
+        the two nodes
+    :param label: an optional label to be added to new nodes
+    :param snapshot: the Snapshot of the last upload
+    :param encoder: a JSONEncoder object
+    :param optional undirected: `'both'` or `'single'`
+    :rtype: a tuple of the list of batch operations, the new snapshot and
+        two lists of `(job_ids, key, fingerprint)` tuples of the created
+        nodes and edges, which are still missing from the new snapshot
+    """
+    if undirected not in UNDIRECTED_MODES:
+        raise ValueError("Unknown undirected mode: {0}".format(undirected))
+
+    is_digraph = isinstance(graph, nx.DiGraph)
+    reverse = undirected == 'both' and not is_digraph
+    jobs = itertools.count()
+
+    new_snapshot = Snapshot()
+    created_nodes = []
+    created_edges = []
+    node_refs = {}
+    deletes = []
+    node_ops = []
+    label_ops = []
+    relationship_ops = []
+
+    for node_name, properties in graph.nodes(data=True):
+        digest = fingerprint(encoder.encode(properties))
+        old = snapshot.nodes.get(node_name)
+
+        if old is None:
+            job_id = next(jobs)
+            node_ops.append(get_node(job_id, properties))
+            if label:
+                label_ops.append(get_label(job_id, label))
+            node_refs[node_name] = '{{{0}}}'.format(job_id)
+            created_nodes.append(((job_id, ), node_name, digest))
+            continue
+
+        node_id, old_digest = old
+        node_refs[node_name] = '/node/{0}'.format(node_id)
+        new_snapshot.nodes[node_name] = (node_id, digest)
+        if digest != old_digest:
+            node_ops.append({"method": "PUT",
+                             "to": "/node/{0}/properties".format(node_id),
+                             "body": properties})
+
+    for from_node, to_node, properties in graph.edges(data=True):
+        key = (from_node, to_node)
+        if not is_digraph and key not in snapshot.edges and \
+                (to_node, from_node) in snapshot.edges:
+            key = (to_node, from_node)
+
+        digest = fingerprint(encoder.encode(properties))
+        old = snapshot.edges.get(key)
+
+        if old is None:
+            ends = [(from_node, to_node)]
+            if reverse:
+                ends.append((to_node, from_node))
+            job_ids = []
+            for a, b in ends:
+                job_id = next(jobs)
+                body = {"to": node_refs[b], "type": edge_rel_name,
+                        "data": properties}
+                relationship_ops.append({"method": "POST",
+                                         "to": node_refs[a] +
+                                         "/relationships",
+                                         "id": job_id, "body": body})
+                job_ids.append(job_id)
+            created_edges.append((tuple(job_ids), key, digest))
+            continue
+
+        rel_ids, old_digest = old
+        new_snapshot.edges[key] = (rel_ids, digest)
+        if digest != old_digest:
+            for rel_id in rel_ids:
+                relationship_ops.append(
+                    {"method": "PUT",
+                     "to": "/relationship/{0}/properties".format(rel_id),
+                     "body": properties})
+
+    for key, (rel_ids, _) in snapshot.edges.items():
+        if key not in new_snapshot.edges:
+            for rel_id in rel_ids:
+                deletes.append({"method": "DELETE",
+                                "to": "/relationship/{0}".format(rel_id)})
+
+    for node_name, (node_id, _) in snapshot.nodes.items():
+        if node_name not in node_refs:
+            deletes.append({"method": "DELETE",
+                            "to": "/node/{0}".format(node_id)})
+
+    entities = deletes + node_ops + label_ops + relationship_ops
+    return entities, new_snapshot, created_nodes, created_edges
+
+
+def sync_to_neo(server_url, graph, edge_rel_name, snapshot, label=None,
+                encoder=None, undirected='both'):
+    """Upload only the changes of `graph` since the upload described by
+    `snapshot`, and update `snapshot`. The first upload with an empty
+    Snapshot creates the whole graph::
+
+        from neonx import Snapshot, sync_to_neo
+
+        snapshot = Snapshot()
+        sync_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                    snapshot, 'Node')
+
+        # later, after G has changed
+        sync_to_neo("http://localhost:7474/db/data/", G, 'LINKS_TO',
+                    snapshot, 'Node')
+
+    Nodes are identified by their name and edges by their endpoints. New
+    ones are created, changed attributes are replaced and the nodes and
+    edges which are gone are deleted, all in a single transaction. The
+    cost of an upload grows with the number of changes instead of the size
+    of the graph.
+
+    :param server_url: Server URL for the Neo4j server.
+    :param graph: A NetworkX Graph or a DiGraph.
+    :param edge_rel_name: Relationship name between the nodes.
+    :param snapshot: The Snapshot of the last upload. It is updated.
+    :param optional label: It will add this label to new nodes.
+    :param optional encoder: JSONEncoder object. Defaults to JSONEncoder.
+    :param optional undirected: Either `'both'` (the default) or
+        `'single'`. It must be the same for every upload.
+    :rtype: A list of Neo4j batch results.
+    """
+
+    if encoder is None:
+        encoder = json.JSONEncoder()
+
+    entities, new_snapshot, created_nodes, created_edges = \
+        generate_sync_data(graph, edge_rel_name, label, snapshot, encoder,
+                           undirected)
+
+    results = []
+    if entities:
+        with NeoClient(server_url) as client:
+            results = client.post_batch(encoder.encode(entities))
+
+    created_ids = dict((item['id'], get_node_id(item))
+                       for item in results if item.get('location'))
+
+    for job_ids, node_name, digest in created_nodes:
+        new_snapshot.nodes[node_name] = (created_ids[job_ids[0]], digest)
+
+    for job_ids, key, digest in created_edges:
+        rel_ids = tuple(created_ids[job_id] for job_id in job_ids)
+        new_snapshot.edges[key] = (rel_ids, digest)
+
+    snapshot.nodes = new_snapshot.nodes
+    snapshot.edges = new_snapshot.edges
+    return results
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+import networkx as nx
+
+__all__ = ['ReverseEdge', 'iter_edges', 'chunked', 'iter_encoded_edges',
+           'strip_reverse_edges']
+
+
+UNDIRECTED_MODES = ('both', 'single')
+
+
+class ReverseEdge(tuple):
+    """A `(from_node, to_node, properties)` tuple which :func:`iter_edges`
+    yields right after the edge it reverses. Both have the same
+    properties, so their encoding can be reused."""
+
+    __slots__ = ()
+
+
+def iter_edges(graph, undirected='both'):
+    """iterates over the edges of `graph`. For an undirected graph every
+    edge is followed by its reverse edge, a :class:`ReverseEdge`, unless
+    `undirected` is `'single'`.
+
+    :param graph: A NetworkX Graph or a DiGraph
+    :param optional undirected: `'both'` or `'single'`
+    :rtype: an iterator of `(from_node, to_node, properties)` tuples
+    """
+    if undirected not in UNDIRECTED_MODES:
+        raise ValueError("Unknown undirected mode: {0}".format(undirected))
+    reverse = undirected == 'both' and not isinstance(graph, nx.DiGraph)
+
+    for from_node, to_node, properties in graph.edges(data=True):
+        yield from_node, to_node, properties
+        if reverse:
+            yield ReverseEdge((to_node, from_node, properties))
+
+
+def chunked(iterable, size):
+    """splits `iterable` into lists of at most `size` items.
+
+    :param iterable: any iterable
+    :param size: the maximum length of a chunk, or None for a single chunk
+    :rtype: an iterator of lists
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_encoded_edges(edges, encode):
+    """encodes the properties of every edge. A :class:`ReverseEdge`, or an
+    edge whose properties are None (see :func:`strip_reverse_edges`),
+    reuses the encoding of the preceding edge, whatever its properties
+    are.
+
+    :param edges: an iterable of `(from_node, to_node, properties)` tuples
+    :param encode: a function which encodes a dictionary of properties
+    :rtype: an iterator of `(from_node, to_node, encoded)` tuples
+    """
+    encoded = None
+    for edge in edges:
+        from_node, to_node, properties = edge
+        if properties is not None and edge.__class__ is not ReverseEdge:
+            encoded = encode(properties)
+        yield from_node, to_node, encoded
+
+
+def strip_reverse_edges(chunk):
+    """replaces the properties of the reverse edges in `chunk` by None,
+    except at its start, so that they are not pickled for a worker
+    process. :func:`iter_encoded_edges` reuses the encoding of the
+    preceding edge for them.
+
+    :param chunk: a list of `(from_node, to_node, properties)` tuples
+    :rtype: a list of `(from_node, to_node, properties)` tuples
+    """
+    rows = []
+    for edge in chunk:
+        from_node, to_node, properties = edge
+        if rows and edge.__class__ is ReverseEdge:
+            properties = None
+        rows.append((from_node, to_node, properties))
+    return rows
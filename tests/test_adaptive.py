@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_adaptive
+----------------------------------
+
+Tests for `adaptive` module.
+"""
+
+import json
+import unittest
+
+from neonx.adaptive import AdaptiveBatchSize
+
+
+class TestAdaptiveBatchSize(unittest.TestCase):
+
+    def test_increase_and_decrease(self):
+        batch_size = AdaptiveBatchSize(initial=10, step=5, maximum=30,
+                                       target_seconds=1.0)
+
+        batch_size.update(10, 0.1, 100)
+        self.assertEqual(batch_size.size, 15)
+
+        # a partial chunk says nothing about a larger size
+        batch_size.update(3, 0.1, 30)
+        self.assertEqual(batch_size.size, 15)
+
+        for _ in range(5):
+            batch_size.update(batch_size.size, 0.1, 100)
+        self.assertEqual(batch_size.size, 30)
+
+        batch_size.update(30, 2.0, 300)
+        self.assertEqual(batch_size.size, 15)
+
+    def test_byte_limit(self):
+        batch_size = AdaptiveBatchSize(initial=10, step=100, max_bytes=500)
+        batch_size.update(10, 0.1, 100)
+        self.assertEqual(batch_size.size, 50)
+
+    def test_failures(self):
+        batch_size = AdaptiveBatchSize(initial=8, max_failures=2)
+        self.assertTrue(batch_size.failed())
+        self.assertTrue(batch_size.failed())
+        self.assertEqual(batch_size.size, 2)
+        self.assertFalse(batch_size.failed())
+        self.assertEqual(batch_size.size, 1)
+
+        batch_size.update(1, 0.1, 10)
+        self.assertTrue(batch_size.failed())
+
+    def test_iter_payloads(self):
+        batch_size = AdaptiveBatchSize(initial=4, max_bytes=20)
+        payloads = list(batch_size.iter_payloads(range(10), json.dumps))
+
+        self.assertEqual([item for chunk, _ in payloads for item in chunk],
+                         list(range(10)))
+        for chunk, data in payloads:
+            self.assertEqual(data, json.dumps(chunk))
+            self.assertTrue(len(data) <= 20)
+
+        batch_size = AdaptiveBatchSize(max_bytes=5)
+        self.assertRaises(ValueError, list,
+                          batch_size.iter_payloads(['too long'], json.dumps))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, AdaptiveBatchSize, decrease=1)
+        self.assertRaises(ValueError, AdaptiveBatchSize, minimum=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_benchmarks
+----------------------------------
+
+Tests for the fake Neo4j server of the `benchmarks` package.
+"""
+
+import unittest
+
+import networkx as nx
+
+from neonx.neo import get_neo_graph, write_to_neo
+
+from benchmarks.fake_neo import FakeNeoServer
+from benchmarks.run import run_benchmark
+
+
+class TestFakeNeoServer(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.Graph()
+        self.graph.add_node(1, name='a')
+        self.graph.add_node(2, name='b')
+        self.graph.add_edge(1, 2, weight=1)
+
+    def round_trip(self, compress=False, **options):
+        with FakeNeoServer(compress) as server:
+            write_to_neo(server.url, self.graph, 'LINKS_TO', 'Node',
+                         **options)
+            return (get_neo_graph(server.url, 'Node'),
+                    get_neo_graph(server.url, 'Node', page_size=1))
+
+    def check(self, graphs, edges=2):
+        for graph in graphs:
+            self.assertEqual(sorted(d['name'] for _, d in
+                                    graph.nodes(data=True)), ['a', 'b'])
+            self.assertEqual(graph.number_of_edges(), edges)
+            for _, _, data in graph.edges(data=True):
+                self.assertEqual(data, {'weight': 1,
+                                        'neo_rel_name': 'LINKS_TO'})
+
+    def test_batch(self):
+        self.check(self.round_trip())
+        self.check(self.round_trip(batch_size=2))
+
+    def test_cypher(self):
+        self.check(self.round_trip(backend='cypher'))
+        self.check(self.round_trip(key='node_id'))
+        self.check(self.round_trip(undirected='single'), 1)
+
+    def test_compression(self):
+        self.check(self.round_trip(compression='gzip'))
+        self.check(self.round_trip(compression='deflate', batch_size=2))
+        self.check(self.round_trip(True, compression='gzip',
+                                   backend='cypher'))
+
+    def test_run_benchmark(self):
+        result = run_benchmark('get_geoff', self.graph, 1)
+        self.assertEqual(result['benchmark'], 'get_geoff')
+        self.assertTrue(result['payload_bytes'] > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_bulk
+----------------------------------
+
+Tests for `bulk` module.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from neonx.bulk import write_csv, get_type, merge_types, format_value
+
+import networkx as nx
+
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.path, 'graph-')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def read(self, paths):
+        lines = []
+        for path in paths:
+            with io.open(path, encoding='utf-8') as f:
+                lines.extend(f.read().splitlines())
+        return lines
+
+    def test_types(self):
+        self.assertEqual(get_type(True), 'boolean')
+        self.assertEqual(get_type(2 ** 70), 'long')
+        self.assertEqual(get_type(1.5), 'double')
+        self.assertEqual(get_type(u'né'), 'string')
+        self.assertEqual(get_type([1, 2.5]), 'double[]')
+        self.assertEqual(get_type([]), None)
+        self.assertEqual(get_type([[1]]), 'string')
+        self.assertEqual(merge_types('long', 'double'), 'double')
+        self.assertEqual(merge_types('long[]', 'double'), 'string')
+        self.assertEqual(merge_types(None, 'boolean'), 'boolean')
+
+    def test_format_value(self):
+        self.assertEqual(format_value(None, 'long'), '')
+        self.assertEqual(format_value(False, 'boolean'), 'false')
+        self.assertEqual(format_value(3, 'double'), '3.0')
+        self.assertEqual(format_value('say "hi"', 'string'), '"say ""hi"""')
+        self.assertEqual(format_value(['a', 'b'], 'string[]'), '"a;b"')
+        self.assertEqual(format_value(7, 'string'), '"7"')
+
+    def test_graph(self):
+        graph = nx.Graph()
+        graph.add_node(1, name=u'né', age=30)
+        graph.add_node(2, name='b', age=2.5, tags=['x', 'y'])
+        graph.add_node(3, active=True)
+        graph.add_edge(1, 2, weight=2)
+        graph.add_edge(2, 3)
+
+        files = write_csv(graph, self.prefix, 'LINKS_TO', 'Person')
+
+        self.assertEqual(files['nodes'], [self.prefix + 'nodes_header.csv',
+                                          self.prefix + 'nodes_0.csv'])
+        self.assertEqual(self.read(files['nodes']), [
+            ':ID,active:boolean,age:double,name:string,tags:string[],:LABEL',
+            u'0,,30.0,"né",,"Person"',
+            '1,,2.5,"b","x;y","Person"',
+            '2,true,,,,"Person"'])
+        self.assertEqual(self.read(files['relationships']), [
+            ':START_ID,:END_ID,:TYPE,weight:long',
+            '0,1,"LINKS_TO",2',
+            '1,0,"LINKS_TO",2',
+            '1,2,"LINKS_TO",',
+            '2,1,"LINKS_TO",'])
+
+    def test_key_and_single(self):
+        graph = nx.Graph()
+        graph.add_edge('a', 'b')
+
+        files = write_csv(graph, self.prefix, 'LINKS_TO', key='name',
+                          undirected='single')
+
+        lines = self.read(files['nodes'])
+        self.assertEqual(lines[0], ':ID,name:string')
+        self.assertEqual(sorted(line.split(',')[1] for line in lines[1:]),
+                         ['"a"', '"b"'])
+        lines = self.read(files['relationships'])
+        self.assertEqual(lines[0], ':START_ID,:END_ID,:TYPE')
+        self.assertTrue(lines[1] in ('0,1,"LINKS_TO"', '1,0,"LINKS_TO"'))
+        self.assertEqual(len(lines), 2)
+
+    def test_shards(self):
+        graph = nx.path_graph(10, create_using=nx.DiGraph())
+
+        files = write_csv(graph, self.prefix, 'NEXT', shards=3)
+
+        self.assertEqual(len(files['nodes']), 4)
+        self.assertEqual([len(self.read([path]))
+                          for path in files['nodes'][1:]], [4, 4, 2])
+        self.assertEqual([len(self.read([path]))
+                          for path in files['relationships'][1:]], [3, 3, 3])
+        lines = self.read(files['relationships'])
+        self.assertEqual(lines[0], ':START_ID,:END_ID,:TYPE')
+        self.assertEqual(lines[1:], ['{0},{1},"NEXT"'.format(i, i + 1)
+                                     for i in range(9)])
+
+    def test_invalid(self):
+        graph = nx.Graph()
+        self.assertRaises(ValueError, write_csv, graph, self.prefix, 'R',
+                          shards=0)
+        self.assertRaises(ValueError, write_csv, graph, self.prefix, 'R',
+                          undirected='none')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_checkpoint
+----------------------------------
+
+Tests for `checkpoint` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from neonx.checkpoint import Checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.log = os.path.join(self.path, 'upload.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_resume(self):
+        checkpoint = Checkpoint(self.log)
+        checkpoint.commit(('node', 0), [('a', 1), ('b', 2)])
+        checkpoint.commit(('relationship', 0))
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.log)
+        self.assertEqual(checkpoint.done,
+                         set([('node', 0), ('relationship', 0)]))
+        self.assertEqual(checkpoint.node_ids, {'a': 1, 'b': 2})
+
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.log))
+
+    def test_truncated_record(self):
+        checkpoint = Checkpoint(self.log)
+        checkpoint.commit(('node', 0), [('a', 1)])
+        checkpoint.commit(('node', 1), [('b', 2)])
+        checkpoint.close()
+
+        with open(self.log, 'r+b') as f:
+            f.truncate(os.path.getsize(self.log) - 3)
+
+        checkpoint = Checkpoint(self.log)
+        self.assertEqual(checkpoint.done, set([('node', 0)]))
+        checkpoint.commit(('node', 1), [('b', 2)])
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.log)
+        self.assertEqual(checkpoint.node_ids, {'a': 1, 'b': 2})
+        checkpoint.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
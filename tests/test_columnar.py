@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_columnar
+----------------------------------
+
+Tests for `columnar` module.
+"""
+
+import unittest
+
+from neonx.columnar import get_arrays, get_sparse
+
+try:
+    import numpy
+    import scipy.sparse
+except ImportError:
+    numpy = None
+
+
+NODE_ROWS = [[3, {"name": "a"}], [1, {"name": "b", "age": 2}],
+             [7, {}]]
+RELATIONSHIP_ROWS = [[10, 3, "LINKS_TO", {"w": 1}, 1],
+                     [11, 1, "LINKS_TO", {}, 7],
+                     [12, 1, "LIKES", {}, 7]]
+
+
+@unittest.skipIf(numpy is None, "requires numpy and scipy")
+class TestColumnar(unittest.TestCase):
+
+    def test_get_arrays(self):
+        result = get_arrays(NODE_ROWS, RELATIONSHIP_ROWS)
+
+        self.assertEqual(result['node_ids'].tolist(), [3, 1, 7])
+        self.assertEqual(result['node_properties']['name'].tolist(),
+                         ["a", "b", None])
+        self.assertEqual(result['node_properties']['age'].tolist(),
+                         [None, 2, None])
+        self.assertEqual(result['edges'].tolist(), [[3, 1], [1, 7], [1, 7]])
+        self.assertEqual(result['edge_properties']['w'].tolist(),
+                         [1, None, None])
+        self.assertEqual(result['edge_properties']['neo_rel_name'].tolist(),
+                         ["LINKS_TO", "LINKS_TO", "LIKES"])
+
+    def test_get_arrays_empty(self):
+        result = get_arrays([], [])
+        self.assertEqual(result['node_ids'].shape, (0, ))
+        self.assertEqual(result['edges'].shape, (0, 2))
+
+    def test_get_sparse(self):
+        adjacency, node_ids = get_sparse(NODE_ROWS, RELATIONSHIP_ROWS)
+
+        self.assertTrue(scipy.sparse.isspmatrix_csr(adjacency))
+        self.assertEqual(node_ids.tolist(), [1, 3, 7])
+        self.assertEqual(adjacency.toarray().tolist(),
+                         [[0, 0, 2], [1, 0, 0], [0, 0, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
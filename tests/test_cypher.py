@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_cypher
+----------------------------------
+
+Tests for `cypher` module.
+"""
+
+import unittest
+
+from neonx.cypher import (get_node_statement, get_relationship_statement,
+                          get_constraint_statement, get_merge_node_statement,
+                          get_merge_relationship_statement, check_errors,
+                          get_page_statement, get_node_page_query,
+                          get_relationship_page_query, NODE_PAGE_QRY,
+                          RELATIONSHIP_PAGE_QRY)
+
+
+class TestStatements(unittest.TestCase):
+
+    def test_node_statement(self):
+        statement = get_node_statement([{}, {"name": "a"}], "Person")
+        self.assertEqual(statement['statement'],
+                         'UNWIND {rows} AS props CREATE (n:`Person`) '
+                         'SET n = props RETURN ID(n)')
+        self.assertEqual(statement['parameters'],
+                         {"rows": [{}, {"name": "a"}]})
+
+    def test_node_statement_no_label(self):
+        statement = get_node_statement([{}])
+        self.assertTrue('CREATE (n) SET' in statement['statement'])
+
+    def test_relationship_statement(self):
+        statement = get_relationship_statement([[1, 2, {}]], "LINKS`TO")
+        self.assertTrue('CREATE (a)-[r:`LINKS``TO`]->(b)'
+                        in statement['statement'])
+        self.assertEqual(statement['parameters'], {"rows": [[1, 2, {}]]})
+
+    def test_merge_statements(self):
+        statement = get_constraint_statement("Person", "name")
+        self.assertEqual(statement['statement'],
+                         'CREATE CONSTRAINT ON (n:`Person`) '
+                         'ASSERT n.`name` IS UNIQUE')
+
+        statement = get_merge_node_statement([["a", {}]], "Person", "name")
+        self.assertEqual(statement['statement'],
+                         'UNWIND {rows} AS row '
+                         'MERGE (n:`Person` {`name`: row[0]}) '
+                         'SET n += row[1]')
+
+        statement = get_merge_relationship_statement([["a", "b", {}]],
+                                                     "Person", "name",
+                                                     "KNOWS")
+        self.assertEqual(statement['statement'],
+                         'UNWIND {rows} AS row '
+                         'MATCH (a:`Person` {`name`: row[0]}) '
+                         'MATCH (b:`Person` {`name`: row[1]}) '
+                         'MERGE (a)-[r:`KNOWS`]->(b) SET r += row[2]')
+        self.assertEqual(statement['parameters'], {"rows": [["a", "b", {}]]})
+
+    def test_page_queries(self):
+        self.assertEqual(get_node_page_query(), NODE_PAGE_QRY)
+        self.assertEqual(get_relationship_page_query(), RELATIONSHIP_PAGE_QRY)
+
+        query = get_node_page_query(['name', 'a{b'], 'n.age > {min}')
+        statement = get_page_statement(query, "Person", -1, 10, {"min": 3})
+        self.assertEqual(statement['statement'],
+                         'MATCH (n:`Person`) WHERE ID(n) > {last} '
+                         'AND (n.age > {min}) '
+                         'RETURN ID(n), {`name`: n.`name`, `a{b`: n.`a{b`} '
+                         'ORDER BY ID(n) LIMIT {limit}')
+        self.assertEqual(statement['parameters'],
+                         {"last": -1, "limit": 10, "min": 3})
+
+        query = get_relationship_page_query(['w'], ['KNOWS', 'LIKES'],
+                                            'n.age > 3')
+        statement = get_page_statement(query, "Person", 5, 10)
+        self.assertEqual(statement['statement'],
+                         'MATCH (a:`Person`)-[r:`KNOWS`|`LIKES`]->'
+                         '(b:`Person`) WHERE ID(r) > {last} '
+                         'AND ALL(n IN [a, b] WHERE (n.age > 3)) '
+                         'RETURN ID(r), ID(a), TYPE(r), {`w`: r.`w`}, ID(b) '
+                         'ORDER BY ID(r) LIMIT {limit}')
+
+    def test_check_errors(self):
+        check_errors({"results": [], "errors": []})
+        error = {"code": "Neo.ClientError.Statement.InvalidSyntax",
+                 "message": "Invalid input"}
+        self.assertRaises(Exception, check_errors,
+                          {"results": [], "errors": [error]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_encoding
+----------------------------------
+
+Tests for `encoding` module.
+"""
+
+import json
+import unittest
+
+from neonx.encoding import EncodingCache
+
+
+class CountingEncoder(json.JSONEncoder):
+
+    calls = 0
+
+    def encode(self, o):
+        self.calls += 1
+        return json.JSONEncoder.encode(self, o)
+
+
+class TestEncodingCache(unittest.TestCase):
+
+    def test_encode(self):
+        encoder = CountingEncoder()
+        cache = EncodingCache(encoder)
+
+        self.assertEqual(cache.encode({"weight": 1}), '{"weight": 1}')
+        self.assertEqual(cache.encode({"weight": 1}), '{"weight": 1}')
+        self.assertEqual(cache.encode({"weight": True}), '{"weight": true}')
+        self.assertEqual(cache.encode({"weight": 1.0}), '{"weight": 1.0}')
+        self.assertEqual(encoder.calls, 3)
+
+    def test_containers(self):
+        encoder = CountingEncoder()
+        cache = EncodingCache(encoder)
+        properties = {"path": [1, 2]}
+
+        self.assertEqual(cache.encode(properties), '{"path": [1, 2]}')
+        self.assertEqual(cache.encode(properties), '{"path": [1, 2]}')
+        self.assertEqual(cache.encode({"x": (1, 1)}), '{"x": [1, 1]}')
+        self.assertEqual(cache.encode({"x": (1, True)}), '{"x": [1, true]}')
+        self.assertEqual(encoder.calls, 4)
+
+    def test_reused_dictionary(self):
+        cache = EncodingCache(json.JSONEncoder())
+        properties = {}
+
+        encoded = []
+        for weight in [1, 2, 3]:
+            properties["weight"] = weight
+            encoded.append(cache.encode(properties))
+        self.assertEqual(encoded, ['{"weight": 1}', '{"weight": 2}',
+                                   '{"weight": 3}'])
+
+    def test_eviction(self):
+        encoder = CountingEncoder()
+        cache = EncodingCache(encoder, maxsize=2)
+
+        for i in [1, 2, 1, 3, 1, 2]:
+            cache.encode({"weight": i})
+        self.assertEqual(len(cache.cache), 1)
+        self.assertEqual(encoder.calls, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
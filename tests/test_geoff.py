@@ -9,10 +9,13 @@ Tests for `geoff` module.
 """
 
 import datetime
+import gzip
+import io
 import json
 import unittest
 
-from neonx import get_geoff
+from neonx import (get_geoff, iter_geoff, write_geoff, iter_geoff_stream,
+                   write_geoff_stream, parse_geoff, read_geoff)
 
 import networkx as nx
 
@@ -44,6 +47,121 @@ class TestGetGeoff(unittest.TestCase):
         self.assertEqual(get_geoff(graph, 'LINK_TO'), result)
 
 
+class TestGetGeoffSingle(unittest.TestCase):
+
+    def test_get_geoff_graph_single(self):
+        result = """(0)
+(1)
+(2)
+(0)-[:LINK_TO {"debug": false}]->(1)
+(0)-[:LINK_TO]->(2)"""
+        graph = nx.balanced_tree(2, 1)
+        graph[0][1]['debug'] = False
+        self.assertEqual(get_geoff(graph, 'LINK_TO', undirected='single'),
+                         result)
+
+    def test_unknown_mode(self):
+        graph = nx.balanced_tree(2, 1)
+        self.assertRaises(ValueError, get_geoff, graph, 'LINK_TO',
+                          undirected='none')
+
+
+class TestWriteGeoff(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.balanced_tree(2, 3)
+        self.graph.add_node(0, name=u'caf\u00e9')
+
+    def test_iter_geoff(self):
+        lines = list(iter_geoff(self.graph, 'LINK_TO'))
+        self.assertEqual(len(lines), 15 + 2 * 14)
+        self.assertEqual('\n'.join(lines), get_geoff(self.graph, 'LINK_TO'))
+
+    def test_write_geoff(self):
+        f = io.BytesIO()
+        write_geoff(self.graph, f, 'LINK_TO')
+        self.assertEqual(f.getvalue().decode('utf-8'),
+                         get_geoff(self.graph, 'LINK_TO'))
+
+    def test_write_geoff_compressed(self):
+        f = io.BytesIO()
+        write_geoff(self.graph, f, 'LINK_TO', compress=True)
+
+        f.seek(0)
+        data = gzip.GzipFile(fileobj=f, mode='rb').read()
+        self.assertEqual(data.decode('utf-8'),
+                         get_geoff(self.graph, 'LINK_TO'))
+
+    def test_stream(self):
+        graph = self.graph.to_directed()
+        nodes = (node for node in graph.nodes(data=True))
+        edges = (edge for edge in graph.edges(data=True))
+
+        f = io.BytesIO()
+        write_geoff_stream(nodes, edges, f, 'LINK_TO')
+        self.assertEqual(f.getvalue().decode('utf-8'),
+                         get_geoff(graph, 'LINK_TO'))
+
+        lines = list(iter_geoff_stream([('a', {})], [('a', 'b', {'w': 1})],
+                                       'LINK_TO'))
+        self.assertEqual(lines, ['(a)', '(a)-[:LINK_TO {"w": 1}]->(b)'])
+
+
+class TestReadGeoff(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.balanced_tree(2, 3)
+        self.graph.add_node(0, name=u'caf\u00e9')
+        self.graph[0][1]['weight'] = 2
+
+    def check(self, graph):
+        self.assertEqual(sorted(graph.nodes(data=True)),
+                         sorted(self.graph.nodes(data=True)))
+        self.assertEqual(graph.number_of_edges(),
+                         self.graph.number_of_edges())
+        self.assertEqual(graph[1][0], {'weight': 2,
+                                       'neo_rel_name': 'LINK_TO'})
+
+    def test_parse_geoff(self):
+        lines = get_geoff(self.graph, 'LINK_TO').splitlines()
+        lines[3:3] = ['', '# a comment']
+        self.check(parse_geoff(lines, nx.Graph(), int))
+
+        digraph = parse_geoff(lines, nodetype=int)
+        self.assertTrue(isinstance(digraph, nx.DiGraph))
+        self.assertEqual(digraph.number_of_edges(), 28)
+
+    def test_read_geoff_compressed(self):
+        f = io.BytesIO()
+        write_geoff(self.graph, f, 'LINK_TO', compress=True)
+
+        f.seek(0)
+        self.check(read_geoff(f, nx.Graph(), int, compress=True))
+
+    def test_names(self):
+        graph = parse_geoff([u'(caf\u00e9 {"a": [1, 2]})'.encode('utf-8'),
+                             u'(x y)-[:R]->(caf\u00e9)'])
+        self.assertEqual(sorted(graph.nodes()), [u'caf\u00e9', 'x y'])
+        self.assertEqual(graph.node[u'caf\u00e9'], {'a': [1, 2]})
+
+    def test_edge_like_properties(self):
+        graph = nx.DiGraph()
+        graph.add_node(1, s='x)-[:y')
+        graph.add_node(2, s='x)-[:y]->(z')
+        graph.add_edge(1, 2, s='a)-[:b]->(c')
+
+        result = parse_geoff(get_geoff(graph, 'LINK_TO').splitlines(),
+                             nodetype=int)
+        self.assertEqual(sorted(result.nodes(data=True)),
+                         sorted(graph.nodes(data=True)))
+        self.assertEqual(result[1][2], {'s': 'a)-[:b]->(c',
+                                        'neo_rel_name': 'LINK_TO'})
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, parse_geoff, ['(0)', 'nonsense'])
+        self.assertRaises(ValueError, parse_geoff, ['(0 {"a": )'])
+
+
 class DateEncoder(json.JSONEncoder):
 
     def default(self, o):
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_index
+----------------------------------
+
+Tests for `index` module.
+"""
+
+import json
+import unittest
+
+from neonx.index import NodeIndex, get_node_index
+from neonx.neo import NeoClient, generate_data
+
+import networkx as nx
+
+
+class TestNodeIndex(unittest.TestCase):
+
+    def test_names(self):
+        names = ['a', u'né', (1, 2), 3, 'b', -7, 2 ** 70]
+        index = NodeIndex(names)
+
+        self.assertEqual(len(index), len(names))
+        self.assertTrue(index.table is not None)
+        # a list is taken over without a copy
+        self.assertTrue(index.names is names)
+        for i, name in enumerate(names):
+            self.assertEqual(index[name], i)
+        self.assertFalse('c' in index)
+        self.assertRaises(KeyError, index.__getitem__, 4)
+
+    def test_collisions(self):
+        names = [i * 64 for i in range(100)]
+        index = NodeIndex(names)
+        self.assertEqual([index[name] for name in names], list(range(100)))
+
+    def test_duplicate_names(self):
+        index = NodeIndex(['a', 'b', 'a'])
+        self.assertEqual(index['a'], 2)
+        self.assertEqual(index['b'], 1)
+
+    def test_integer_names(self):
+        index = NodeIndex(range(5))
+        self.assertTrue(index.table is None)
+        self.assertEqual(index[3], 3)
+        self.assertFalse(5 in index)
+        self.assertFalse('3' in index)
+
+    def test_get_node_index(self):
+        self.assertEqual(get_node_index(['a', 'b']), {'a': 0, 'b': 1})
+        self.assertEqual(get_node_index(['a', 'b'], 'compact')['b'], 1)
+        self.assertRaises(ValueError, get_node_index, ['a'], 'list')
+
+    def test_generate_data(self):
+        graph = nx.relabel_nodes(nx.gnm_random_graph(30, 60, seed=1),
+                                 lambda node: 'node {0}'.format(node))
+        encoder = json.JSONEncoder()
+        for g in (graph, nx.convert_node_labels_to_integers(graph)):
+            self.assertEqual(generate_data(g, "LINK_TO", "ITEM", encoder,
+                                           node_index='compact'),
+                             generate_data(g, "LINK_TO", "ITEM", encoder))
+
+    def test_write_to_neo(self):
+        graph = nx.relabel_nodes(nx.gnm_random_graph(30, 60, seed=1),
+                                 lambda node: 'node {0}'.format(node))
+        client = NeoClient("http://localhost:7474/db/data/")
+        bodies = []
+
+        def post_batch(data):
+            bodies.append(b''.join(data).decode('utf-8'))
+            return ["Dummy"]
+
+        client.post_batch = post_batch
+        client.write_to_neo(graph, "LINK_TO", "ITEM", node_index='compact')
+        client.write_to_neo(graph, "LINK_TO", "ITEM", processes=2,
+                            node_index='compact')
+        data = generate_data(graph, "LINK_TO", "ITEM", json.JSONEncoder())
+        self.assertEqual(bodies, [data, data])
+
+        self.assertRaises(ValueError, client.write_to_neo, graph, "LINK_TO",
+                          node_index='list')
+        self.assertRaises(ValueError, client.write_to_neo, graph, "LINK_TO",
+                          batch_size=10, node_index='compact')
+
+
+if __name__ == '__main__':
+    unittest.main()
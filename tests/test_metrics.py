@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+----------------------------------
+
+Tests for `metrics` module.
+"""
+
+import unittest
+
+from neonx.metrics import Meter, MetricsRecorder
+
+
+class TestMeter(unittest.TestCase):
+
+    def test_meter(self):
+        meter = Meter(['[', '{"a": 1}', ']'])
+        self.assertEqual(list(meter), ['[', '{"a": 1}', ']'])
+        self.assertEqual(meter.size, 10)
+        self.assertTrue(meter.seconds >= 0)
+
+
+class TestMetricsRecorder(unittest.TestCase):
+
+    def test_totals(self):
+        metrics = MetricsRecorder()
+        metrics('request', 0.5, request_bytes=10, response_bytes=2)
+        metrics('request', 0.25, request_bytes=5, response_bytes=3)
+        metrics('discovery', 0.125)
+
+        self.assertEqual(metrics.totals,
+                         {'request': {'calls': 2, 'seconds': 0.75,
+                                      'request_bytes': 15,
+                                      'response_bytes': 5},
+                          'discovery': {'calls': 1, 'seconds': 0.125}})
+
+
+if __name__ == '__main__':
+    unittest.main()
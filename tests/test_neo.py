@@ -9,15 +9,195 @@ Tests for `neo` module.
 """
 
 import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+import zlib
 
-from neonx.neo import generate_data, write_to_neo, get_neo_graph
+from neonx.adaptive import AdaptiveBatchSize
+from neonx.metrics import MetricsRecorder
+from neonx.neo import (NeoClient, compress_data, generate_data,
+                       is_unsent, iter_json_array, write_to_neo,
+                       write_stream_to_neo, add_edges_to_neo, get_neo_graph)
+from neonx.store import NodeIdStore
 
 import httpretty
 import networkx as nx
+import requests
+from requests.packages.urllib3.exceptions import (MaxRetryError,
+                                                  NewConnectionError)
 
 
 BATCH_URL = '{"batch":"http://localhost:7474/db/data/batch"}'
+TRANSACTION_URL = \
+    '{"transaction":"http://localhost:7474/db/data/transaction"}'
+
+
+class FakeBatchServer(object):
+    """answers Neo4j batch requests, creating a new node ID for every
+    `/node` operation and a new relationship ID for every `/relationships`
+    operation."""
+
+    def __init__(self):
+        self.requests = []
+        self.next_node_id = 100
+        self.next_relationship_id = 500
+
+    def __call__(self, request, uri, headers):
+        operations = json.loads(request.body.decode('utf-8'))
+        self.requests.append(operations)
+
+        results = []
+        for operation in operations:
+            item = {"id": operation.get("id"), "from": operation["to"]}
+            if operation["to"] == "/node":
+                item["location"] = "http://localhost:7474/db/data/node/" \
+                    "{0}".format(self.next_node_id)
+                self.next_node_id += 1
+            elif operation["to"].endswith("/relationships"):
+                item["location"] = "http://localhost:7474/db/data/" \
+                    "relationship/{0}".format(self.next_relationship_id)
+                self.next_relationship_id += 1
+            results.append(item)
+        return 200, headers, json.dumps(results)
+
+
+class FakeTransactionServer(object):
+    """answers the commit requests of the Neo4j transactional endpoint,
+    creating a new node ID for every row of a node statement."""
+
+    def __init__(self):
+        self.statements = []
+        self.next_node_id = 100
+
+    def __call__(self, request, uri, headers):
+        statements = json.loads(request.body.decode('utf-8'))['statements']
+        self.statements.extend(statements)
+
+        results = []
+        for statement in statements:
+            data = []
+            if 'RETURN ID(n)' in statement['statement']:
+                for _ in statement['parameters']['rows']:
+                    data.append({"row": [self.next_node_id]})
+                    self.next_node_id += 1
+            results.append({"columns": [], "data": data})
+        return 200, headers, json.dumps({"results": results, "errors": []})
+
+
+class FakePagedServer(object):
+    """answers the paged node and relationship queries of `get_neo_graph`
+    from lists of rows, which start with their Neo4j ID."""
+
+    def __init__(self, nodes, relationships):
+        self.nodes = nodes
+        self.relationships = relationships
+        self.requests = 0
+        self.statements = []
+
+    def __call__(self, request, uri, headers):
+        statement = json.loads(request.body.decode('utf-8'))['statements'][0]
+        self.requests += 1
+        self.statements.append(statement)
+
+        rows = self.nodes
+        if statement['statement'].startswith('MATCH (a:'):
+            rows = self.relationships
+        last = statement['parameters']['last']
+        limit = statement['parameters']['limit']
+        page = [{"row": row} for row in rows if row[0] > last][:limit]
+
+        results = [{"columns": [], "data": page}]
+        return 200, headers, json.dumps({"results": results, "errors": []})
+
+
+class FakeNeoClient(NeoClient):
+    """a `NeoClient` which sends its batch requests to a `FakeBatchServer`
+    instead of the network. The request number `fail_at` fails with a
+    lost connection, or with a server error if `status` is present."""
+
+    def __init__(self, fail_at=None, status=None):
+        NeoClient.__init__(self, "http://localhost:7474/db/data/")
+        self.server = FakeBatchServer()
+        self.lock = threading.Lock()
+        self.fail_at = fail_at
+        self.status = status
+
+    def post_batch(self, data):
+        with self.lock:
+            if len(self.server.requests) == self.fail_at:
+                if self.status is None:
+                    raise requests.ConnectionError("Connection aborted.")
+                e = Exception("Unknown server error.")
+                e.status_code = self.status
+                raise e
+            status, headers, body = self.server(FakeRequest(data), None, {})
+        return json.loads(body)
+
+
+class FakeRequest(object):
+
+    def __init__(self, body):
+        self.body = body.encode('utf-8')
+
+
+class FakeResponse(object):
+
+    status_code = 200
+
+    def __init__(self, body):
+        self.content = json.dumps(body).encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class TimeoutSession(object):
+    """a `requests.Session` whose first `failures` POST requests time out
+    with `error`. It records the timeouts it was called with."""
+
+    def __init__(self, failures, error=requests.ConnectTimeout):
+        self.failures = failures
+        self.error = error
+        self.timeouts = []
+
+    def get(self, url, timeout=None):
+        self.timeouts.append(timeout)
+        return FakeResponse({"batch": url + "batch"})
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        if len(self.timeouts) <= self.failures + 1:
+            raise self.error()
+        return FakeResponse(["Dummy"])
+
+    def close(self):
+        pass
+
+
+class DroppingSession(object):
+    """a `requests.Session` which commits every POST request, but loses
+    the connection of the first `drops` ones before the answer is sent."""
+
+    def __init__(self, drops):
+        self.drops = drops
+        self.committed = []
+
+    def get(self, url, timeout=None):
+        return FakeResponse({"batch": url + "batch",
+                             "transaction": url + "transaction"})
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.committed.append(data)
+        if len(self.committed) <= self.drops:
+            raise requests.ConnectionError("Connection aborted.")
+        return FakeResponse({"results": [{}], "errors": []})
+
+    def close(self):
+        pass
 
 
 class TestGenerateNeoData(unittest.TestCase):
@@ -95,6 +275,15 @@ class TestGenerateNeoData(unittest.TestCase):
                               "LINKS_TO", "ITEM")
         self.assertEqual(result, ["Dummy"])
 
+    def test_undirected_single(self):
+        graph = nx.balanced_tree(2, 1)
+        result = generate_data(graph, "LINK_TO", None, json.JSONEncoder(),
+                               undirected='single')
+        relationships = [(e['to'], e['body']['to'])
+                         for e in json.loads(result) if 'type' in e['body']]
+        self.assertEqual(relationships, [('{0}/relationships', '{1}'),
+                                         ('{0}/relationships', '{2}')])
+
     @httpretty.activate
     def test_failure_500(self):
         graph = nx.balanced_tree(2, 1)
@@ -131,6 +320,726 @@ class TestGenerateNeoData(unittest.TestCase):
         self.assertRaises(Exception, f)
 
 
+class TestIterJsonArray(unittest.TestCase):
+
+    def test_iter_json_array(self):
+        encoder = json.JSONEncoder()
+        entities = [{"id": i, "body": {"name": u"n\u00e9"}} for i in range(5)]
+        fragments = list(iter_json_array((encoder.encode(entity)
+                                          for entity in entities),
+                                         buffer_size=20))
+
+        self.assertTrue(len(fragments) > 1)
+        self.assertEqual(b''.join(fragments).decode('utf-8'),
+                         encoder.encode(entities))
+
+    def test_iter_json_array_empty(self):
+        fragments = list(iter_json_array([]))
+        self.assertEqual(fragments, [b'[]'])
+
+    @httpretty.activate
+    def test_streamed_body(self):
+        graph = nx.balanced_tree(2, 2)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body='["Dummy"]')
+
+        result = write_to_neo("http://localhost:7474/db/data/", graph,
+                              "LINK_TO")
+
+        self.assertEqual(result, ["Dummy"])
+        headers = httpretty.last_request().headers
+        self.assertEqual(headers['transfer-encoding'], 'chunked')
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_compress_data(self):
+        data = generate_data(nx.balanced_tree(2, 3), "LINK_TO", "ITEM",
+                             json.JSONEncoder())
+        fragments = iter_json_array((json.dumps(entity)
+                                     for entity in json.loads(data)),
+                                    buffer_size=100)
+
+        gzipped = compress_data(data, 'gzip')
+        self.assertTrue(len(gzipped) < len(data) / 4)
+        self.assertEqual(zlib.decompress(gzipped, 16 + zlib.MAX_WBITS),
+                         data.encode('utf-8'))
+
+        deflated = b''.join(compress_data(fragments, 'deflate'))
+        self.assertEqual(json.loads(zlib.decompress(deflated).decode('utf-8')),
+                         json.loads(data))
+
+    def test_unknown_compression(self):
+        self.assertRaises(ValueError, compress_data, '[]', 'bzip2')
+        self.assertRaises(ValueError, NeoClient,
+                          "http://localhost:7474/db/data/",
+                          compression='bzip2')
+
+    @httpretty.activate
+    def test_compressed_chunks(self):
+        graph = nx.balanced_tree(2, 1)
+        server = FakeBatchServer()
+
+        def decompress(request, uri, headers):
+            self.assertEqual(request.headers['content-encoding'], 'gzip')
+            body = zlib.decompress(request.body, 16 + zlib.MAX_WBITS)
+            return server(FakeRequest(body.decode('utf-8')), uri, headers)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body=decompress)
+
+        result = write_to_neo("http://localhost:7474/db/data/", graph,
+                              "LINK_TO", batch_size=4, compression='gzip')
+
+        self.assertEqual(len(result), 7)
+        self.assertEqual([len(r) for r in server.requests], [3, 4])
+
+
+class TestWriteChunks(unittest.TestCase):
+
+    @httpretty.activate
+    def test_batch_size(self):
+        graph = nx.balanced_tree(2, 1)
+        graph[0][1]['debug'] = False
+        server = FakeBatchServer()
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body=server)
+
+        result = write_to_neo("http://localhost:7474/db/data/", graph,
+                              "LINK_TO", "ITEM", batch_size=4)
+
+        self.assertEqual(len(result), 10)
+        self.assertEqual([len(r) for r in server.requests], [4, 2, 4])
+        self.assertEqual(server.requests[0][:2],
+                         [{'body': {}, 'id': 0, 'method': 'POST',
+                           'to': '/node'},
+                          {'body': {}, 'id': 1, 'method': 'POST',
+                           'to': '/node'}])
+        self.assertEqual(server.requests[1],
+                         [{'body': {}, 'id': 0, 'method': 'POST',
+                           'to': '/node'},
+                          {'body': "ITEM", 'method': 'POST',
+                           'to': '{0}/labels'}])
+        self.assertEqual(server.requests[2][:2],
+                         [{'body': {'data': {'debug': False},
+                                    'to': '/node/101', 'type': 'LINK_TO'},
+                           'method': 'POST',
+                           'to': '/node/100/relationships'},
+                          {'body': {'data': {'debug': False},
+                                    'to': '/node/100', 'type': 'LINK_TO'},
+                           'method': 'POST',
+                           'to': '/node/101/relationships'}])
+
+    def test_batch_size_one(self):
+        graph = nx.path_graph(3, create_using=nx.DiGraph())
+        client = FakeNeoClient()
+
+        client.write_to_neo(graph, "LINK_TO", "ITEM", batch_size=1)
+
+        # a node and its label are never split
+        self.assertEqual([len(r) for r in client.server.requests],
+                         [2, 2, 2, 1, 1])
+        self.assertEqual([op['to'] for op in client.server.requests[0]],
+                         ['/node', '{0}/labels'])
+
+    def test_workers(self):
+        graph = nx.gnm_random_graph(20, 40, seed=1, directed=True)
+        client = FakeNeoClient()
+
+        result = client.write_to_neo(graph, "LINK_TO", batch_size=10,
+                                     workers=3)
+
+        self.assertEqual(len(result), 60)
+        self.assertEqual(len(client.server.requests), 6)
+        self.assertEqual([item['from'] for item in result[:20]],
+                         ['/node'] * 20)
+
+        relationships = sorted(op['to'] for r in client.server.requests[2:]
+                               for op in r)
+        truth = sorted('/node/{0}/relationships'.format(100 + a)
+                       for a, b in graph.edges())
+        self.assertEqual(relationships, truth)
+
+    def test_workers_failure(self):
+        client = NeoClient("http://localhost:7474/db/data/")
+        sent = []
+
+        def post(data):
+            if data == 0:
+                raise requests.ConnectionError("Connection aborted.")
+            time.sleep(0.05)
+            sent.append(data)
+            return [data]
+
+        self.assertRaises(requests.ConnectionError, list,
+                          client.post_all(post, range(10), workers=2))
+        # the request in flight is finished, no further one is started
+        self.assertTrue(1 in sent)
+        self.assertTrue(max(sent) < 4)
+
+
+class TestWriteStream(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.gnm_random_graph(10, 20, seed=1, directed=True)
+        self.graph.add_node(3, name='three')
+
+    def stream(self):
+        return (iter(self.graph.nodes(data=True)),
+                iter(self.graph.edges(data=True)))
+
+    def test_single_request(self):
+        client = NeoClient("http://localhost:7474/db/data/")
+        bodies = []
+
+        def post_batch(data):
+            bodies.append(b''.join(data).decode('utf-8'))
+            return ["Dummy"]
+
+        client.post_batch = post_batch
+        nodes, edges = self.stream()
+        result = client.write_stream(nodes, edges, "LINK_TO", "ITEM")
+
+        self.assertEqual(result, ["Dummy"])
+        self.assertEqual(bodies, [generate_data(self.graph, "LINK_TO",
+                                                "ITEM",
+                                                json.JSONEncoder())])
+
+    @httpretty.activate
+    def test_write_stream_to_neo(self):
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body='["Dummy"]')
+
+        nodes, edges = self.stream()
+        result = write_stream_to_neo("http://localhost:7474/db/data/",
+                                     nodes, edges, "LINK_TO")
+        self.assertEqual(result, ["Dummy"])
+
+    def test_chunks(self):
+        client = FakeNeoClient()
+        nodes, edges = self.stream()
+
+        result = client.write_stream(nodes, edges, "LINK_TO", batch_size=8)
+
+        self.assertEqual(len(result), 30)
+        self.assertEqual([len(r) for r in client.server.requests],
+                         [8, 2, 8, 8, 4])
+        relationships = [op['to'] for r in client.server.requests[2:]
+                         for op in r]
+        truth = ['/node/{0}/relationships'.format(100 + a)
+                 for a, b in self.graph.edges()]
+        self.assertEqual(relationships, truth)
+
+    def test_duplicate_names(self):
+        client = FakeNeoClient()
+        server = client.server
+
+        def post_batch(data):
+            body = b''.join(data).decode('utf-8')
+            return json.loads(server(FakeRequest(body), None, {})[2])
+
+        client.post_batch = post_batch
+        node_ids, relationship_ids = client.write_stream(
+            [('a', {}), ('a', {}), ('b', {})], [('a', 'b', {})], "LINK_TO",
+            "ITEM", output='ids')
+
+        operations = server.requests[0]
+        self.assertEqual([op['id'] for op in operations[:3]], [0, 1, 2])
+        self.assertEqual([op['to'] for op in operations[3:6]],
+                         ['{0}/labels', '{1}/labels', '{2}/labels'])
+        self.assertEqual(operations[6]['to'], '{1}/relationships')
+        self.assertEqual(operations[6]['body']['to'], '{2}')
+        self.assertEqual(node_ids, {'a': 101, 'b': 102})
+        self.assertEqual(list(relationship_ids), [500])
+
+    def test_unknown_node(self):
+        client = FakeNeoClient()
+        self.assertRaises(KeyError, client.write_stream, [(1, {})],
+                          [(1, 2, {})], "LINK_TO", batch_size=8)
+
+
+class TestWriteOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.Graph()
+        self.graph.add_edges_from([('a', 'b'), ('b', 'c')])
+        self.client = FakeNeoClient()
+        self.node_ids = dict((name, 100 + i)
+                             for i, name in enumerate(self.graph))
+        self.edges = [(self.node_ids[a], self.node_ids[b])
+                      for a, b in self.graph.edges()]
+
+    def test_node_ids(self):
+        result = self.client.write_to_neo(self.graph, "LINK_TO", "ITEM",
+                                          batch_size=4, output='node_ids')
+        self.assertEqual(result, self.node_ids)
+
+    def test_ids(self):
+        node_ids, relationship_ids = self.client.write_to_neo(
+            self.graph, "LINK_TO", batch_size=2, workers=2, output='ids')
+
+        self.assertEqual(node_ids, self.node_ids)
+        self.assertEqual(list(relationship_ids), [500, 501, 502, 503])
+        created = [(int(op['to'].split('/')[2]),
+                    int(op['body']['to'].split('/')[2]))
+                   for r in self.client.server.requests[2:] for op in r]
+        self.assertEqual(created[::2], self.edges)
+
+    def test_single_request(self):
+        server = self.client.server
+
+        def post_batch(data):
+            body = b''.join(data).decode('utf-8')
+            return json.loads(server(FakeRequest(body), None, {})[2])
+
+        self.client.post_batch = post_batch
+        node_ids, relationship_ids = self.client.write_to_neo(
+            self.graph, "LINK_TO", "ITEM", output='ids')
+
+        self.assertEqual(node_ids, self.node_ids)
+        self.assertEqual(list(relationship_ids), [500, 501, 502, 503])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.client.write_to_neo, self.graph,
+                          "LINK_TO", output='everything')
+        self.assertRaises(ValueError, self.client.write_to_neo, self.graph,
+                          "LINK_TO", backend='cypher', output='ids')
+
+
+class TestAddEdges(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = os.path.join(self.path, 'graph.ids')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_add_edges(self):
+        graph = nx.DiGraph()
+        graph.add_edges_from([('a', 'b'), ('b', 'c')])
+        client = FakeNeoClient()
+        client.write_to_neo(graph, "LINK_TO", "ITEM", batch_size=4,
+                            store=self.store)
+
+        with NodeIdStore(self.store) as store:
+            node_ids = dict(store.items())
+        self.assertEqual(node_ids, dict((name, 100 + i)
+                                        for i, name in enumerate(graph)))
+
+        client.server.requests = []
+        relationship_ids = client.add_edges([('c', 'a', {'w': 1}),
+                                             ('a', 'c', {})],
+                                            "LINK_TO", self.store,
+                                            output='ids')
+
+        self.assertEqual(list(relationship_ids), [502, 503])
+        self.assertEqual(client.server.requests, [[
+            {'method': 'POST',
+             'to': '/node/{0}/relationships'.format(node_ids['c']),
+             'body': {'to': '/node/{0}'.format(node_ids['a']),
+                      'type': 'LINK_TO', 'data': {'w': 1}}},
+            {'method': 'POST',
+             'to': '/node/{0}/relationships'.format(node_ids['a']),
+             'body': {'to': '/node/{0}'.format(node_ids['c']),
+                      'type': 'LINK_TO', 'data': {}}}]])
+
+        self.assertRaises(KeyError, client.add_edges, [('a', 'x', {})],
+                          "LINK_TO", self.store)
+
+    def test_single_request_and_adaptive(self):
+        client = FakeNeoClient()
+        server = client.server
+
+        def post_batch(data):
+            if not isinstance(data, type(u'')):
+                data = b''.join(data).decode('utf-8')
+            return json.loads(server(FakeRequest(data), None, {})[2])
+
+        client.post_batch = post_batch
+        with NodeIdStore(self.store) as store:
+            client.write_to_neo(nx.path_graph(3), "LINK_TO", store=store)
+            self.assertEqual(sorted(store.items()),
+                             [(0, 100), (1, 101), (2, 102)])
+
+            result = client.add_edges([(0, 2, {})] * 5, "LINK_TO", store,
+                                      batch_size='auto')
+            self.assertEqual(len(result), 5)
+
+    @httpretty.activate
+    def test_add_edges_to_neo(self):
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body='["Dummy"]')
+
+        with NodeIdStore(self.store) as store:
+            store.update({1: 10, 2: 20})
+        result = add_edges_to_neo("http://localhost:7474/db/data/",
+                                  [(1, 2, {})], "LINK_TO", self.store)
+        self.assertEqual(result, ["Dummy"])
+        self.assertEqual(json.loads(httpretty.last_request().body.decode(
+            'utf-8'))[0]['to'], '/node/10/relationships')
+
+    def test_backend(self):
+        self.assertRaises(ValueError, write_to_neo,
+                          "http://localhost:7474/db/data/", nx.Graph(),
+                          'LINK_TO', backend='cypher', store=self.store)
+
+
+class TestWriteAdaptive(unittest.TestCase):
+
+    def test_auto(self):
+        graph = nx.gnm_random_graph(30, 60, seed=1, directed=True)
+        client = FakeNeoClient()
+        batch_size = AdaptiveBatchSize(initial=4, step=4, max_bytes=2000)
+
+        result = client.write_to_neo(graph, "LINK_TO", "ITEM",
+                                     batch_size=batch_size, workers=2)
+
+        self.assertEqual(len(result), 30 * 2 + 60)
+        sizes = [len(r) for r in client.server.requests]
+        self.assertEqual(sizes[:2], [4, 8])
+        self.assertTrue(max(sizes) > 8)
+
+        relationships = sorted(op['to'] for r in client.server.requests
+                               for op in r if op['to'] != '/node' and
+                               not op['to'].endswith('/labels'))
+        truth = sorted('/node/{0}/relationships'.format(100 + a)
+                       for a, b in graph.edges())
+        self.assertEqual(relationships, truth)
+
+    def test_split_failed_chunk(self):
+        graph = nx.path_graph(8)
+        client = FakeNeoClient(fail_at=1, status=503)
+        post_batch = client.post_batch
+
+        def fail_once(data):
+            try:
+                return post_batch(data)
+            except Exception:
+                client.fail_at = None
+                raise
+
+        client.post_batch = fail_once
+        batch_size = AdaptiveBatchSize(initial=8, step=0)
+        result = client.write_to_neo(graph, "LINK_TO", batch_size=batch_size)
+
+        self.assertEqual(len(result), 8 + 14)
+        # the first chunk of 8 relationships failed and was sent in halves
+        self.assertEqual([len(r) for r in client.server.requests],
+                         [8, 4, 4, 4, 2])
+        self.assertEqual(batch_size.size, 4)
+        self.assertEqual(batch_size.failures, 0)
+
+    def test_lost_connection(self):
+        graph = nx.path_graph(8)
+        client = FakeNeoClient(fail_at=1)
+        batch_size = AdaptiveBatchSize(initial=8, step=0)
+        self.assertRaises(requests.ConnectionError, client.write_to_neo,
+                          graph, "LINK_TO", batch_size=batch_size)
+
+        # the server may have committed the chunk, so it is not split
+        self.assertEqual(len(client.server.requests), 1)
+        self.assertEqual(batch_size.size, 4)
+        self.assertEqual(batch_size.failures, 1)
+
+    def test_give_up(self):
+        client = FakeNeoClient(fail_at=0, status=500)
+        batch_size = AdaptiveBatchSize(initial=16, max_failures=2)
+        self.assertRaises(Exception, client.write_to_neo, nx.path_graph(16),
+                          "LINK_TO", batch_size=batch_size)
+        self.assertEqual(batch_size.failures, 3)
+
+    def test_client_error(self):
+        client = FakeNeoClient()
+        requests_sent = []
+
+        def reject(data):
+            requests_sent.append(data)
+            e = Exception("Invalid property value.")
+            e.status_code = 400
+            raise e
+
+        client.post_batch = reject
+        batch_size = AdaptiveBatchSize(initial=16)
+        self.assertRaises(Exception, client.write_to_neo, nx.path_graph(16),
+                          "LINK_TO", batch_size=batch_size)
+        self.assertEqual(len(requests_sent), 1)
+        self.assertEqual(batch_size.failures, 0)
+        self.assertEqual(batch_size.size, 16)
+
+    def test_backend(self):
+        self.assertRaises(ValueError, write_to_neo,
+                          "http://localhost:7474/db/data/", nx.Graph(),
+                          'LINK_TO', batch_size='auto', backend='cypher')
+
+
+class TestWriteCypher(unittest.TestCase):
+
+    @httpretty.activate
+    def test_cypher_backend(self):
+        graph = nx.balanced_tree(2, 1)
+        graph.add_node(2, debug='test')
+        graph[0][1]['debug'] = False
+        server = FakeTransactionServer()
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=TRANSACTION_URL)
+
+        httpretty.register_uri(
+            httpretty.POST,
+            "http://localhost:7474/db/data/transaction/commit",
+            body=server)
+
+        result = write_to_neo("http://localhost:7474/db/data/", graph,
+                              "LINK_TO", "ITEM", batch_size=3,
+                              backend='cypher')
+
+        self.assertEqual(len(result), 3)
+        self.assertEqual(len(server.statements), 3)
+        self.assertEqual(server.statements[0]['parameters']['rows'],
+                         [{}, {}, {'debug': 'test'}])
+        self.assertTrue(':`ITEM`' in server.statements[0]['statement'])
+
+        rows = server.statements[1]['parameters']['rows'] + \
+            server.statements[2]['parameters']['rows']
+        self.assertEqual(rows, [[100, 101, {'debug': False}],
+                                [101, 100, {'debug': False}],
+                                [100, 102, {}],
+                                [102, 100, {}]])
+
+    @httpretty.activate
+    def test_merge_key(self):
+        graph = nx.DiGraph()
+        graph.add_edge('a', 'b', weight=2)
+        server = FakeTransactionServer()
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=TRANSACTION_URL)
+
+        httpretty.register_uri(
+            httpretty.POST,
+            "http://localhost:7474/db/data/transaction/commit",
+            body=server)
+
+        write_to_neo("http://localhost:7474/db/data/", graph, "LINK_TO",
+                     "ITEM", key='name')
+
+        self.assertEqual(len(server.statements), 3)
+        self.assertTrue(server.statements[0]['statement'].startswith(
+            'CREATE CONSTRAINT'))
+        self.assertEqual(sorted(server.statements[1]['parameters']['rows']),
+                         [['a', {}], ['b', {}]])
+        self.assertEqual(server.statements[2]['parameters']['rows'],
+                         [['a', 'b', {'weight': 2}]])
+
+    def test_merge_key_without_label(self):
+        self.assertRaises(ValueError, write_to_neo,
+                          "http://localhost:7474/db/data/", nx.Graph(),
+                          'LINK_TO', key='name')
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, write_to_neo,
+                          "http://localhost:7474/db/data/", nx.Graph(),
+                          'LINK_TO', backend='geoff')
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    @httpretty.activate
+    def test_retries(self):
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               responses=[
+                                   httpretty.Response(body='Unavailable',
+                                                      status=503),
+                                   httpretty.Response(body='["Dummy"]')])
+
+        client = NeoClient("http://localhost:7474/db/data/", retries=2,
+                           backoff=0)
+        self.assertEqual(client.post_batch('[]'), ["Dummy"])
+
+        client = NeoClient("http://localhost:7474/db/data/", backoff=0)
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body='Unavailable', status=503)
+        self.assertRaises(Exception, client.post_batch, '[]')
+
+    def test_timeout(self):
+        session = TimeoutSession(failures=1)
+        client = NeoClient("http://localhost:7474/db/data/", session,
+                           retries=2, backoff=0, timeout=5)
+        self.assertEqual(client.post_batch('[]'), ["Dummy"])
+        self.assertEqual(session.timeouts, [5, 5, 5])
+
+        client = NeoClient("http://localhost:7474/db/data/",
+                           TimeoutSession(failures=1), timeout=5)
+        self.assertRaises(requests.Timeout, client.post_batch, '[]')
+
+        # the server may have committed a request whose answer timed out
+        session = TimeoutSession(failures=1, error=requests.ReadTimeout)
+        client = NeoClient("http://localhost:7474/db/data/", session,
+                           retries=2, backoff=0)
+        self.assertRaises(requests.ReadTimeout, client.post_batch, '[]')
+        self.assertEqual(len(session.timeouts), 2)
+
+    def test_dropped_connection(self):
+        session = DroppingSession(drops=1)
+        client = NeoClient("http://localhost:7474/db/data/", session,
+                           retries=2, backoff=0)
+        self.assertRaises(requests.ConnectionError, client.post_batch, '[]')
+        self.assertEqual(session.committed, ['[]'])
+
+        # MERGE statements can be sent again
+        session = DroppingSession(drops=1)
+        client = NeoClient("http://localhost:7474/db/data/", session,
+                           retries=2, backoff=0)
+        self.assertEqual(client.post_statements('{}', idempotent=True), [{}])
+        self.assertEqual(session.committed, ['{}', '{}'])
+
+    def test_unsent(self):
+        refused = requests.ConnectionError(MaxRetryError(
+            None, '/', NewConnectionError(None, "Connection refused")))
+        self.assertTrue(is_unsent(refused))
+        self.assertTrue(is_unsent(requests.ConnectTimeout()))
+        self.assertFalse(is_unsent(requests.ReadTimeout()))
+        self.assertFalse(is_unsent(
+            requests.ConnectionError("Connection aborted.")))
+
+    def test_checkpoint(self):
+        graph = nx.path_graph(6)
+        checkpoint = os.path.join(self.path, 'upload.checkpoint')
+
+        client = FakeNeoClient(fail_at=4)
+        self.assertRaises(Exception, client.write_to_neo, graph, "LINK_TO",
+                          batch_size=3, checkpoint=checkpoint)
+        self.assertTrue(os.path.exists(checkpoint))
+
+        client.fail_at = None
+        result = client.write_to_neo(graph, "LINK_TO", batch_size=3,
+                                     checkpoint=checkpoint)
+
+        # 2 node chunks and 4 relationship chunks, of which 4 were sent
+        # before the failure
+        self.assertEqual(len(client.server.requests), 6)
+        self.assertEqual(len(result), 3 + 1)
+        self.assertFalse(os.path.exists(checkpoint))
+
+        relationships = [op['to'] for r in client.server.requests[2:]
+                         for op in r]
+        self.assertEqual(relationships[-1], '/node/105/relationships')
+
+    def test_checkpoint_backend(self):
+        self.assertRaises(ValueError, write_to_neo,
+                          "http://localhost:7474/db/data/", nx.Graph(),
+                          'LINK_TO', backend='cypher',
+                          checkpoint=os.path.join(self.path, 'upload'))
+
+
+class TestNeoClient(unittest.TestCase):
+
+    @httpretty.activate
+    def test_cached_server_urls(self):
+        graph = nx.balanced_tree(2, 1)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body='["Dummy"]')
+
+        with NeoClient("http://localhost:7474/db/data/") as client:
+            for _ in range(3):
+                result = client.write_to_neo(graph, "LINK_TO", "ITEM")
+                self.assertEqual(result, ["Dummy"])
+
+        methods = [r.method for r in httpretty.latest_requests()]
+        self.assertEqual(methods.count('GET'), 1)
+
+    @httpretty.activate
+    def test_expired_server_urls(self):
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        client = NeoClient("http://localhost:7474/db/data/", ttl=-1)
+        client.get_server_urls()
+        client.get_server_urls()
+
+        methods = [r.method for r in httpretty.latest_requests()]
+        self.assertEqual(methods.count('GET'), 2)
+
+    @httpretty.activate
+    def test_metrics(self):
+        graph = nx.balanced_tree(2, 1)
+        server = FakeBatchServer()
+        metrics = MetricsRecorder()
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body=server)
+
+        write_to_neo("http://localhost:7474/db/data/", graph, "LINK_TO",
+                     "ITEM", batch_size=4, metrics=metrics)
+
+        totals = metrics.totals
+        self.assertEqual(sorted(totals), ['decode', 'discovery', 'encode',
+                                          'request', 'write_to_neo'])
+        self.assertEqual(totals['discovery']['calls'], 1)
+        self.assertEqual(totals['encode']['calls'], 3)
+        self.assertEqual(totals['request']['calls'], 3)
+        self.assertEqual(totals['encode']['request_bytes'],
+                         totals['request']['request_bytes'])
+        self.assertEqual(totals['request']['request_bytes'],
+                         sum(len(json.dumps(r)) for r in server.requests))
+        self.assertTrue(totals['request']['response_bytes'] > 0)
+        self.assertEqual(totals['decode']['results'], 10)
+        self.assertEqual(totals['write_to_neo']['nodes'], 3)
+        self.assertEqual(totals['write_to_neo']['edges'], 2)
+
+
 class TestGetGraph(unittest.TestCase):
 
     @httpretty.activate
@@ -168,6 +1077,84 @@ class TestGetGraph(unittest.TestCase):
         self.assertEqual(graph.edge[1][2]['neo_rel_name'], "LINKS_TO")
         self.assertEqual(graph.edge[1][2]['date'], "2011-01-01")
 
+        graph = get_neo_graph("http://localhost:7474/db/data/", "Node",
+                              create_using=nx.Graph())
+
+        self.assertFalse(isinstance(graph, nx.DiGraph))
+        self.assertTrue(graph.has_edge(2, 1))
+        self.assertEqual(graph.edge[2][1]['neo_rel_name'], "LINKS_TO")
+
+
+class TestGetGraphPages(unittest.TestCase):
+
+    @httpretty.activate
+    def test_get_digraph_pages(self):
+        nodes = [[i, {"name": str(i)}] for i in range(5)]
+        relationships = [[10 + i, i, "LINKS_TO", {"w": i}, i + 1]
+                         for i in range(4)]
+        server = FakePagedServer(nodes, relationships)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=TRANSACTION_URL)
+
+        httpretty.register_uri(
+            httpretty.POST,
+            "http://localhost:7474/db/data/transaction/commit",
+            body=server)
+
+        graph = get_neo_graph("http://localhost:7474/db/data/", "Node",
+                              page_size=2)
+
+        self.assertEqual(server.requests, 6)
+        self.assertEqual(graph.number_of_nodes(), 5)
+        self.assertEqual(graph.number_of_edges(), 4)
+        self.assertEqual(graph.node[4]["name"], "4")
+        self.assertEqual(graph.edge[3][4], {"w": 3,
+                                            "neo_rel_name": "LINKS_TO"})
+
+    @httpretty.activate
+    def test_get_digraph_filtered(self):
+        nodes = [[1, {"name": "a"}], [2, {"name": None}]]
+        relationships = [[10, 1, "KNOWS", {}, 2]]
+        server = FakePagedServer(nodes, relationships)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=TRANSACTION_URL)
+
+        httpretty.register_uri(
+            httpretty.POST,
+            "http://localhost:7474/db/data/transaction/commit",
+            body=server)
+
+        graph = get_neo_graph("http://localhost:7474/db/data/", "Person",
+                              node_properties=['name'],
+                              relationship_properties=[],
+                              rel_types=['KNOWS'],
+                              where='n.age >= {min_age}',
+                              params={'min_age': 18})
+
+        self.assertEqual(server.requests, 2)
+        node_statement, relationship_statement = server.statements
+        self.assertEqual(node_statement['parameters'],
+                         {"last": -1, "limit": 100000, "min_age": 18})
+        self.assertTrue('AND (n.age >= {min_age}) RETURN ID(n), '
+                        '{`name`: n.`name`}' in node_statement['statement'])
+        self.assertTrue('-[r:`KNOWS`]->'
+                        in relationship_statement['statement'])
+        self.assertTrue('TYPE(r), {}, ID(b)'
+                        in relationship_statement['statement'])
+
+        self.assertEqual(graph.node[1], {"name": "a"})
+        self.assertEqual(graph.node[2], {})
+        self.assertEqual(graph.edge[1][2], {"neo_rel_name": "KNOWS"})
+
+    def test_unknown_output(self):
+        self.assertRaises(ValueError, get_neo_graph,
+                          "http://localhost:7474/db/data/", "Node",
+                          output='table')
+
 
 if __name__ == '__main__':
     unittest.main()
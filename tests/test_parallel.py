@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_parallel
+----------------------------------
+
+Tests for `parallel` module.
+"""
+
+import json
+import unittest
+
+from neonx.geoff import get_geoff, iter_geoff_blocks
+from neonx.neo import (NeoClient, generate_data, iter_encoded_entities,
+                       iter_parallel_entities)
+from neonx.utils import iter_edges
+
+import networkx as nx
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = nx.gnm_random_graph(30, 60, seed=1)
+        for node, properties in self.graph.nodes(data=True):
+            properties['name'] = u'né {0}'.format(node)
+        for i, (_, _, properties) in enumerate(self.graph.edges(data=True)):
+            properties['weight'] = i % 3
+
+    def test_entities(self):
+        encoder = json.JSONEncoder()
+        for undirected in ('both', 'single'):
+            serial = list(iter_encoded_entities(self.graph, "LINK_TO",
+                                                "ITEM", encoder, undirected))
+            blocks = list(iter_parallel_entities(
+                self.graph.nodes(data=True),
+                iter_edges(self.graph, undirected), "LINK_TO", "ITEM",
+                encoder, 2, chunk_size=7))
+            self.assertTrue(len(blocks) > 10)
+            self.assertEqual(', '.join(blocks), ', '.join(serial))
+
+    def test_generate_data(self):
+        encoder = json.JSONEncoder()
+        self.assertEqual(generate_data(self.graph, "LINK_TO", None, encoder,
+                                       processes=2),
+                         generate_data(self.graph, "LINK_TO", None, encoder))
+
+    def test_write_to_neo(self):
+        client = NeoClient("http://localhost:7474/db/data/")
+        bodies = []
+
+        def post_batch(data):
+            bodies.append(b''.join(data).decode('utf-8'))
+            return ["Dummy"]
+
+        client.post_batch = post_batch
+        client.write_to_neo(self.graph, "LINK_TO", "ITEM", processes=2)
+        self.assertEqual(bodies, [generate_data(self.graph, "LINK_TO",
+                                                "ITEM",
+                                                json.JSONEncoder())])
+
+        self.assertRaises(ValueError, client.write_to_neo, self.graph,
+                          "LINK_TO", batch_size=10, processes=2)
+
+    def test_geoff(self):
+        blocks = list(iter_geoff_blocks(self.graph, "LINK_TO",
+                                        json.JSONEncoder(), 'both', 2,
+                                        chunk_size=7))
+        self.assertTrue(len(blocks) > 10)
+        self.assertEqual('\n'.join(blocks),
+                         get_geoff(self.graph, "LINK_TO"))
+        self.assertEqual(get_geoff(self.graph, "LINK_TO", processes=3),
+                         get_geoff(self.graph, "LINK_TO"))
+
+    def test_empty_graph(self):
+        self.assertEqual(generate_data(nx.Graph(), "LINK_TO", "ITEM",
+                                       json.JSONEncoder(), processes=2),
+                         '[]')
+        self.assertEqual(get_geoff(nx.Graph(), "LINK_TO", processes=2), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
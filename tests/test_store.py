@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_store
+----------------------------------
+
+Tests for `store` module.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from neonx.store import NodeIdStore
+
+
+class TestNodeIdStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.path, 'graph.ids')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_persistent(self):
+        with NodeIdStore(self.store_path) as store:
+            store.update({1: 100, '1': 101, u'né': 102})
+            store.update([(2, 103)])
+            self.assertEqual(len(store), 4)
+
+        with NodeIdStore(self.store_path) as store:
+            self.assertEqual(store[1], 100)
+            self.assertEqual(store['1'], 101)
+            self.assertEqual(store[u'né'], 102)
+            self.assertTrue(2 in store)
+            self.assertFalse(3 in store)
+            self.assertRaises(KeyError, store.__getitem__, 3)
+
+            store.update({1: 200})
+            self.assertEqual(dict(store.items()),
+                             {1: 200, '1': 101, u'né': 102, 2: 103})
+
+    def test_unsupported_name(self):
+        with NodeIdStore(':memory:') as store:
+            self.assertRaises(ValueError, store.update, [((1, 2), 100)])
+            self.assertRaises(ValueError, store.__getitem__, (1, 2))
+            self.assertEqual(len(store), 0)
+
+            self.assertRaises(ValueError, store.update,
+                              [('a', 100), ((1, 2), 101)])
+            store.update({'b': 102})
+            self.assertEqual(dict(store.items()), {'b': 102})
+
+    def test_closed(self):
+        store = NodeIdStore(':memory:')
+        store.close()
+        self.assertRaises(sqlite3.ProgrammingError, store.__getitem__, 1)
+        self.assertRaises(sqlite3.ProgrammingError, store.update, {1: 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
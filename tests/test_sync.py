@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_sync
+----------------------------------
+
+Tests for `sync` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from neonx.sync import Snapshot, sync_to_neo
+
+import httpretty
+import networkx as nx
+
+from .test_neo import BATCH_URL, FakeBatchServer
+
+
+class TestSyncToNeo(unittest.TestCase):
+
+    def sync(self, graph, snapshot):
+        server = FakeBatchServer()
+        server.next_node_id = 100 + len(snapshot.nodes)
+
+        httpretty.register_uri(httpretty.GET,
+                               "http://localhost:7474/db/data/",
+                               body=BATCH_URL)
+
+        httpretty.register_uri(httpretty.POST,
+                               "http://localhost:7474/db/data/batch",
+                               body=server)
+
+        sync_to_neo("http://localhost:7474/db/data/", graph, "LINK_TO",
+                    snapshot, "ITEM")
+        if not server.requests:
+            return []
+        return [(op['method'], op['to']) for op in server.requests[0]]
+
+    @httpretty.activate
+    def test_sync(self):
+        graph = nx.path_graph(3)
+        snapshot = Snapshot()
+
+        operations = self.sync(graph, snapshot)
+        self.assertEqual(len(operations), 3 + 3 + 4)
+        self.assertEqual(snapshot.nodes[2][0], 102)
+        self.assertEqual(len(snapshot.edges[(1, 2)][0]), 2)
+
+        self.assertEqual(self.sync(graph, snapshot), [])
+
+        graph.node[0]['name'] = 'a'
+        graph.remove_node(2)
+        graph.add_edge(1, 3)
+        operations = self.sync(graph, snapshot)
+
+        self.assertEqual(operations[:3],
+                         [('DELETE', '/relationship/502'),
+                          ('DELETE', '/relationship/503'),
+                          ('DELETE', '/node/102')])
+        self.assertEqual(operations[3:],
+                         [('PUT', '/node/100/properties'),
+                          ('POST', '/node'),
+                          ('POST', '{0}/labels'),
+                          ('POST', '/node/101/relationships'),
+                          ('POST', '{0}/relationships')])
+        self.assertEqual(sorted(snapshot.nodes), [0, 1, 3])
+        self.assertEqual(sorted(snapshot.edges), [(0, 1), (1, 3)])
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, sync_to_neo,
+                          "http://localhost:7474/db/data/", nx.path_graph(3),
+                          "LINK_TO", Snapshot(), undirected='Both')
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_save_load(self):
+        path = os.path.join(self.path, 'graph.snapshot')
+        self.assertEqual(Snapshot.load(path).nodes, {})
+
+        snapshot = Snapshot()
+        snapshot.nodes['a'] = (1, b'12345678')
+        snapshot.edges[('a', 'a')] = ((2, ), b'12345678')
+        snapshot.save(path)
+
+        snapshot = Snapshot.load(path)
+        self.assertEqual(snapshot.nodes, {'a': (1, b'12345678')})
+        self.assertEqual(snapshot.edges, {('a', 'a'): ((2, ), b'12345678')})
+
+
+if __name__ == '__main__':
+    unittest.main()
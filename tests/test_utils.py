@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_utils
+----------------------------------
+
+Tests for `utils` module.
+"""
+
+import unittest
+
+from neonx.utils import (ReverseEdge, chunked, iter_edges, iter_encoded_edges,
+                         strip_reverse_edges)
+
+import networkx as nx
+
+
+class TestUtils(unittest.TestCase):
+
+    def test_iter_edges(self):
+        graph = nx.Graph()
+        graph.add_edge(1, 2, w=3)
+
+        self.assertEqual(list(iter_edges(graph)),
+                         [(1, 2, {'w': 3}), (2, 1, {'w': 3})])
+        self.assertEqual(list(iter_edges(graph, 'single')),
+                         [(1, 2, {'w': 3})])
+        self.assertEqual(list(iter_edges(graph.to_directed(), 'both')),
+                         [(1, 2, {'w': 3}), (2, 1, {'w': 3})])
+        self.assertRaises(ValueError, list, iter_edges(graph, 'Both'))
+
+    def test_iter_encoded_edges(self):
+        graph = nx.Graph()
+        graph.add_edge(1, 2, tags=['a'])
+        graph.add_edge(2, 3, tags=['a'])
+        encoded = []
+
+        def encode(properties):
+            encoded.append(properties)
+            return str(len(encoded))
+
+        edges = list(iter_edges(graph))
+        self.assertTrue(isinstance(edges[1], ReverseEdge))
+        self.assertEqual(list(iter_encoded_edges(edges, encode)),
+                         [(1, 2, '1'), (2, 1, '1'), (2, 3, '2'), (3, 2, '2')])
+        self.assertEqual(len(encoded), 2)
+
+    def test_strip_reverse_edges(self):
+        graph = nx.Graph()
+        graph.add_edge(1, 2, w=3)
+        graph.add_edge(2, 3, w=4)
+        edges = list(iter_edges(graph))
+
+        self.assertEqual(strip_reverse_edges(edges),
+                         [(1, 2, {'w': 3}), (2, 1, None),
+                          (2, 3, {'w': 4}), (3, 2, None)])
+        # a chunk which starts with a reverse edge keeps its properties
+        self.assertEqual(strip_reverse_edges(edges[1:3]),
+                         [(2, 1, {'w': 3}), (2, 3, {'w': 4})])
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunked([], 2)), [])
+        self.assertEqual(list(chunked(range(3), None)), [[0, 1, 2]])
+
+
+if __name__ == '__main__':
+    unittest.main()